@@ -0,0 +1,115 @@
+# Benchmark: memory profile of the streaming OCR history export
+#
+# Jalankan dari root proyek:
+#   python -m backend.benchmarks.bench_export [--rows 1000000] [--format csv] [--gzip]
+#
+# Sumber data sintetis menghasilkan baris per halaman saat diminta (tidak ada tabel
+# 1 juta baris di memori), jadi yang terukur hanya memori jalur ekspor itu sendiri.
+# Memori Python (tracemalloc) dicetak per 10% kemajuan dan harus tetap datar.
+
+import argparse
+import asyncio
+import resource
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from ..services import ocr_service
+from ..storage.supabase_storage import SupabaseStorage
+from .fake_supabase import FakeResponse, parse_logic_tree
+
+class SyntheticResultsQuery:
+    """
+    Answers keyset pages of ocr_results with generated rows; the date filters are ignored.
+    Row i has id ...{i:012d}, so the page after a keyset starts at the row after that id.
+    """
+    def __init__(self, client: "SyntheticResultsClient"):
+        self._client = client
+        self._total_rows = client.total_rows
+        self._start = 0
+        self._limit = client.total_rows
+
+    def select(self, columns: str = "*"):
+        return self
+
+    def gte(self, column, value):
+        return self
+
+    def lt(self, column, value):
+        return self
+
+    def or_(self, filters: str):
+        # processed_at.gt.t,and(processed_at.eq.t,id.gt.i): resume after row i
+        pending = parse_logic_tree(filters)
+        while pending:
+            node = pending.pop()
+            if len(node) == 2:
+                pending.extend(node[1])
+            elif node[0] == "id" and node[1] == "gt":
+                self._start = int(node[2].rsplit("-", 1)[-1]) + 1
+        return self
+
+    def order(self, column, desc: bool = False):
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def execute(self) -> FakeResponse:
+        start, end = self._start, self._start + self._limit - 1
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self._client.rows_served += max(0, min(end + 1, self._total_rows) - start)
+        return FakeResponse([
+            {
+                "id": f"00000000-0000-4000-8000-{i:012d}",
+                "file_name": f"scan_{i}.png",
+                "extracted_text": f"Synthetic OCR text for row {i}, with a comma and \"quotes\".",
+                "processed_at": (base + timedelta(seconds=i)).isoformat(),
+                "image_url": f"http://fake-supabase.local/storage/v1/object/public/ocr-images/{i}.png",
+            }
+            for i in range(start, min(end + 1, self._total_rows))
+        ])
+
+class SyntheticResultsClient:
+    def __init__(self, total_rows: int):
+        self.total_rows = total_rows
+        self.rows_served = 0
+
+    def table(self, table_name: str) -> SyntheticResultsQuery:
+        return SyntheticResultsQuery(self)
+
+async def run_export(args) -> None:
+    client = SyntheticResultsClient(args.rows)
+    checkpoint_every = max(1, args.rows // 10)
+    next_checkpoint = checkpoint_every
+    bytes_out = 0
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    print(f"{'rows':>10} {'MiB out':>9} {'py current KiB':>15} {'py peak KiB':>12} {'maxrss MiB':>11}")
+    async for chunk in ocr_service.stream_results_export(
+        SupabaseStorage(client), export_format=args.format, gzip_output=args.gzip, chunk_size=args.chunk_size
+    ):
+        bytes_out += len(chunk)
+        rows_seen = client.rows_served
+        if rows_seen >= next_checkpoint:
+            current, peak = tracemalloc.get_traced_memory()
+            maxrss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"{rows_seen:>10} {bytes_out / 2**20:>9.1f} {current / 1024:>15.0f} {peak / 1024:>12.0f} {maxrss_mib:>11.0f}")
+            next_checkpoint += checkpoint_every
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    print(f"Exported {args.rows} rows ({bytes_out / 2**20:.1f} MiB) in {elapsed:.1f}s "
+          f"-> {args.rows / elapsed:,.0f} rows/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory profile of GET /ocr/results/export.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=ocr_service.EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    asyncio.run(run_export(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Benchmark: screenshot sequence OCR (frame differencing) vs OCR of every full frame
+#
+# Jalankan dari root proyek:
+#   python -m backend.benchmarks.bench_frame_sequence [--frames 12] [--scroll 240] [--repeat 3]
+#
+# Membuat percakapan chat sintetis (header dan kolom input tetap, isi di-scroll),
+# lalu membandingkan jumlah piksel yang dikirim ke Tesseract. Bagian "end-to-end"
+# (waktu Tesseract sebenarnya) hanya jalan jika executable tesseract tersedia.
+
+import argparse
+import shutil
+import statistics
+import time
+from typing import List
+import cv2
+import numpy as np
+import pytesseract
+from ..services import frame_sequence, tesseract_runner
+
+HEADER_HEIGHT = 120
+FOOTER_HEIGHT = 110
+
+def make_conversation(width: int, height: int) -> np.ndarray:
+    """Tall binarised chat transcript with alternating left/right bubbles."""
+    page = np.full((height, width), 255, dtype=np.uint8)
+    for i, y in enumerate(range(60, height - 30, 70)):
+        x = 40 if i % 2 else width // 3
+        cv2.putText(page, f"message {i:03d} see you at the station", (x, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2, cv2.LINE_AA)
+    _, binary = cv2.threshold(page, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+def make_frames(conversation: np.ndarray, frame_height: int, frames: int, scroll: int) -> List[np.ndarray]:
+    width = conversation.shape[1]
+    visible = frame_height - HEADER_HEIGHT - FOOTER_HEIGHT
+    result = []
+    for i in range(frames):
+        frame = np.full((frame_height, width), 255, dtype=np.uint8)
+        cv2.putText(frame, "Project group chat", (30, 70), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 2)
+        frame[HEADER_HEIGHT - 4:HEADER_HEIGHT - 2] = 0
+        frame[HEADER_HEIGHT:HEADER_HEIGHT + visible] = conversation[i * scroll:i * scroll + visible]
+        cv2.putText(frame, "Type a message", (30, frame_height - 45), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+        result.append(np.where(frame >= 128, 255, 0).astype(np.uint8))
+    return result
+
+def sequence_canvases(frames: List[np.ndarray]) -> List[np.ndarray]:
+    """What perform_sequence_ocr sends to Tesseract."""
+    plans = frame_sequence.plan_sequence(frames)
+    crops = [frames[plan.index][top:bottom] for plan in plans for top, bottom in plan.bands]
+    return [canvas for canvas, _ in frame_sequence.build_montages(crops)] if crops else []
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame-differencing sequence OCR vs full-frame OCR.")
+    parser.add_argument("--frames", type=int, default=12)
+    parser.add_argument("--scroll", type=int, default=240, help="rows scrolled between frames")
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    visible = args.height - HEADER_HEIGHT - FOOTER_HEIGHT
+    conversation = make_conversation(args.width, visible + args.scroll * args.frames)
+    frames = make_frames(conversation, args.height, args.frames, args.scroll)
+
+    planning_ms = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        canvases = sequence_canvases(frames)
+        planning_ms.append((time.perf_counter() - start) * 1000)
+    full_pixels = sum(frame.size for frame in frames)
+    sequence_pixels = sum(canvas.size for canvas in canvases)
+    print(f"{args.frames} frames {args.width}x{args.height}, scroll {args.scroll} rows/frame")
+    print(f"  planning + montage          median {statistics.median(planning_ms):9.2f} ms")
+    print(f"  pixels to Tesseract         full frames {full_pixels:>12,}   sequence {sequence_pixels:>12,} "
+          f"({sequence_pixels / full_pixels:.1%}) in {len(canvases)} call(s)")
+
+    if shutil.which(pytesseract.pytesseract.tesseract_cmd) is None:
+        print("\nEnd-to-end: skipped (tesseract executable not found)")
+        return
+    config = "-l eng --psm 11"
+    start = time.perf_counter()
+    for frame in frames:
+        tesseract_runner.image_to_data(frame, config=config)
+    full_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for canvas in canvases:
+        tesseract_runner.image_to_data(canvas, config=config)
+    sequence_seconds = time.perf_counter() - start
+    print("\nEnd-to-end Tesseract time:")
+    print(f"  every full frame            {full_seconds * 1000:9.0f} ms")
+    print(f"  changed areas only          {sequence_seconds * 1000:9.0f} ms   (x{full_seconds / max(sequence_seconds, 1e-9):.1f})")
+
+if __name__ == "__main__":
+    main()
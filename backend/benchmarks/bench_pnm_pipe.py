@@ -0,0 +1,94 @@
+# Benchmark: PIL + PNG temp file (pytesseract) vs raw PBM/PGM over a pipe
+#
+# Jalankan dari root proyek:
+#   python -m backend.benchmarks.bench_pnm_pipe [--width 2480] [--height 3508] [--repeat 10]
+#
+# Bagian "handoff" selalu jalan (tidak butuh Tesseract): mengukur biaya menyiapkan
+# buffer untuk Tesseract, termasuk decode di sisi penerima. Bagian "end-to-end"
+# hanya jalan jika executable tesseract tersedia.
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import cv2
+import numpy as np
+from PIL import Image
+import pytesseract
+from ..services import tesseract_runner
+
+def make_binarised_page(width: int, height: int) -> np.ndarray:
+    """Synthetic A4-ish page of text, thresholded the same way preprocess_general does."""
+    page = np.full((height, width), 255, dtype=np.uint8)
+    line_height = 48
+    for i, y in enumerate(range(80, height - 40, line_height)):
+        text = f"Line {i:04d} the quick brown fox jumps over the lazy dog 0123456789"
+        cv2.putText(page, text, (60, y), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 0, 2, cv2.LINE_AA)
+    _, binary = cv2.threshold(page, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+def legacy_handoff(img: np.ndarray) -> None:
+    """What pytesseract does: PIL image -> PNG temp file on disk -> decoded again by Tesseract."""
+    pil_img = Image.fromarray(img)
+    fd, path = tempfile.mkstemp(suffix=".PNG")
+    os.close(fd)
+    try:
+        pil_img.save(path, format="PNG")
+        decoded = cv2.imread(path, cv2.IMREAD_GRAYSCALE) # stand-in for leptonica's PNG decode
+        assert decoded is not None
+    finally:
+        os.remove(path)
+
+def pipe_handoff(img: np.ndarray) -> None:
+    """New path: raw PNM bytes in memory, decoded by Tesseract without inflating."""
+    data = tesseract_runner.encode_pnm(img)
+    decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    assert decoded is not None
+
+def time_it(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def report(label: str, samples: list) -> float:
+    median = statistics.median(samples)
+    print(f"  {label:<28} median {median:9.2f} ms   min {min(samples):9.2f} ms")
+    return median
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=2480)
+    parser.add_argument("--height", type=int, default=3508)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    img = make_binarised_page(args.width, args.height)
+    print(f"Synthetic binarised page: {args.width}x{args.height}, "
+          f"PBM payload {len(tesseract_runner.encode_pnm(img)) / 1024:.0f} KiB")
+
+    print("Handoff (encode + disk + decode):")
+    legacy = report("PIL -> PNG temp file", time_it(lambda: legacy_handoff(img), args.repeat))
+    piped = report("PBM over pipe", time_it(lambda: pipe_handoff(img), args.repeat))
+    print(f"  speedup x{legacy / piped:.1f}")
+
+    if shutil.which(pytesseract.pytesseract.tesseract_cmd) is None:
+        print("End-to-end: skipped (tesseract executable not found).")
+        return
+
+    config = "-l eng --psm 3"
+    repeat = max(1, args.repeat // 5)
+    print("End-to-end image_to_data:")
+    legacy = report("pytesseract (PIL/PNG)", time_it(
+        lambda: pytesseract.image_to_data(Image.fromarray(img), config=config,
+                                          output_type=pytesseract.Output.DATAFRAME), repeat))
+    piped = report("tesseract_runner (PBM)", time_it(
+        lambda: tesseract_runner.image_to_data(img, config=config), repeat))
+    print(f"  saved {legacy - piped:.1f} ms per page")
+
+if __name__ == "__main__":
+    main()
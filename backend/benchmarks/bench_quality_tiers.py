@@ -0,0 +1,142 @@
+# Benchmark: speed and accuracy of the OCR quality tiers on a synthetic corpus
+#
+# Jalankan dari root proyek:
+#   python -m backend.benchmarks.bench_quality_tiers [--pages 6] [--tiers fast,balanced,best]
+#
+# Korpus: halaman teks acak (kata bahasa Inggris/Indonesia) dengan ground truth,
+# dalam beberapa ukuran huruf dan degradasi (bersih, noise, blur, JPEG).
+# Untuk setiap tier diukur waktu preprocessing + Tesseract dan akurasinya
+# (CER/WER terhadap ground truth). Tanpa executable tesseract hanya bagian
+# preprocessing (waktu dan ukuran gambar) yang dijalankan.
+
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import statistics
+import time
+from typing import List, Sequence, Tuple
+import cv2
+import numpy as np
+import pytesseract
+from .. import dependencies # noqa: F401 - sets TESSDATA_PREFIX like the app does
+from ..services import ocr_service, quality_tiers, tesseract_runner
+
+VOCABULARY = (
+    "the quick brown fox jumps over lazy dog invoice total amount date meeting station "
+    "saya akan datang besok pagi terima kasih banyak harga jumlah tanggal rapat kantor "
+    "please confirm order number payment received schedule update selamat siang kabar baik"
+).split()
+
+DEGRADATIONS = ("clean", "noise", "blur", "jpeg")
+
+def make_page(rng: random.Random, font_scale: float, degradation: str,
+              width: int = 1600, lines: int = 14) -> Tuple[bytes, str]:
+    """Encoded image + ground-truth text (one line per rendered line)."""
+    line_height = int(60 * font_scale) + 12
+    page = np.full((line_height * (lines + 1), width), 255, dtype=np.uint8)
+    truth = []
+    for i in range(lines):
+        words = []
+        while True:
+            candidate = words + [rng.choice(VOCABULARY)]
+            (text_width, _), _ = cv2.getTextSize(" ".join(candidate), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)
+            if text_width > width - 80:
+                break
+            words = candidate
+        truth.append(" ".join(words))
+        cv2.putText(page, truth[-1], (40, line_height * (i + 1)), cv2.FONT_HERSHEY_SIMPLEX,
+                    font_scale, 0, 2, cv2.LINE_AA)
+
+    if degradation == "noise":
+        noise = np.random.default_rng(rng.randint(0, 2**31)).normal(0, 30, page.shape)
+        page = np.clip(page + noise, 0, 255).astype(np.uint8)
+    elif degradation == "blur":
+        page = cv2.GaussianBlur(page, (5, 5), 1.2)
+    if degradation == "jpeg":
+        ok, encoded = cv2.imencode(".jpg", page, [cv2.IMWRITE_JPEG_QUALITY, 35])
+    else:
+        ok, encoded = cv2.imencode(".png", page)
+    assert ok
+    return encoded.tobytes(), "\n".join(truth)
+
+def edit_distance(a: Sequence, b: Sequence) -> int:
+    previous = list(range(len(b) + 1))
+    for i, item_a in enumerate(a, 1):
+        current = [i]
+        for j, item_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (item_a != item_b)))
+        previous = current
+    return previous[-1]
+
+def error_rates(predicted: str, truth: str) -> Tuple[float, float]:
+    """(character error rate, word error rate), whitespace-normalised."""
+    predicted_words, truth_words = predicted.split(), truth.split()
+    cer = edit_distance(" ".join(predicted_words), " ".join(truth_words)) / max(1, len(" ".join(truth_words)))
+    wer = edit_distance(predicted_words, truth_words) / max(1, len(truth_words))
+    return cer, wer
+
+def preprocess(tier: quality_tiers.QualityTier, image_bytes: bytes) -> np.ndarray:
+    with contextlib.redirect_stdout(io.StringIO()): # preprocess_general logs every call
+        return ocr_service.preprocess_general(image_bytes, tier)
+
+def recognise(tier: quality_tiers.QualityTier, img: np.ndarray, languages: List[str]) -> str:
+    data = tesseract_runner.image_to_data(img, config=quality_tiers.build_config(tier, languages, "default"))
+    data = ocr_service.filter_ocr_data(data)
+    return " ".join(str(text) for text in data.text)
+
+def main():
+    parser = argparse.ArgumentParser(description="Speed/accuracy of the fast, balanced and best OCR tiers.")
+    parser.add_argument("--pages", type=int, default=6, help="pages per (font size, degradation) cell")
+    parser.add_argument("--tiers", default=",".join(quality_tiers.QUALITY_TIER_NAMES))
+    parser.add_argument("--languages", default="eng")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    languages = args.languages.split(",")
+    corpus = [
+        (f"{scale:.1f}/{degradation}", *make_page(rng, scale, degradation))
+        for scale in (0.6, 1.0)
+        for degradation in DEGRADATIONS
+        for _ in range(args.pages)
+    ]
+    tiers = [quality_tiers.get_tier(name) for name in args.tiers.split(",")]
+    has_tesseract = shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+    print(f"Corpus: {len(corpus)} pages ({args.pages} per font size x degradation), languages {'+'.join(languages)}")
+    for tier in tiers:
+        print(f"  {tier.name:<9} {quality_tiers.build_config(tier, languages, 'default')}")
+    if not has_tesseract:
+        print("tesseract executable not found: reporting preprocessing only")
+
+    header = f"\n{'tier':<9} {'prep ms':>8} {'Mpx':>6}"
+    if has_tesseract:
+        header += f" {'ocr ms':>8} {'CER':>7} {'WER':>7}"
+    print(header)
+    for tier in tiers:
+        prep_ms, ocr_ms, pixels, cers, wers = [], [], [], [], []
+        per_cell = {}
+        for cell, image_bytes, truth in corpus:
+            start = time.perf_counter()
+            img = preprocess(tier, image_bytes)
+            prep_ms.append((time.perf_counter() - start) * 1000)
+            pixels.append(img.size)
+            if not has_tesseract:
+                continue
+            start = time.perf_counter()
+            predicted = recognise(tier, img, languages)
+            ocr_ms.append((time.perf_counter() - start) * 1000)
+            cer, wer = error_rates(predicted, truth)
+            cers.append(cer)
+            wers.append(wer)
+            per_cell.setdefault(cell, []).append(cer)
+        line = f"{tier.name:<9} {statistics.median(prep_ms):>8.1f} {statistics.mean(pixels) / 1e6:>6.2f}"
+        if has_tesseract:
+            line += f" {statistics.median(ocr_ms):>8.0f} {statistics.mean(cers):>7.2%} {statistics.mean(wers):>7.2%}"
+        print(line)
+        if per_cell:
+            print("          CER by cell: " + ", ".join(f"{cell} {statistics.mean(values):.1%}" for cell, values in per_cell.items()))
+
+if __name__ == "__main__":
+    main()
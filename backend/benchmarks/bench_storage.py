@@ -0,0 +1,70 @@
+# Benchmark: per-operation persistence latency of the storage backends
+#
+# Jalankan dari root proyek:
+#   python -m backend.benchmarks.bench_storage [--ops 500] [--wan-latency-ms 60]
+#
+# Membandingkan LocalStorage (SQLite WAL + file) dengan SupabaseStorage di atas
+# FakeSupabase yang diberi latensi WAN buatan (default 60 ms per panggilan).
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+from ..storage.base import OcrStorage
+from ..storage.local_storage import LocalStorage
+from ..storage.supabase_storage import SupabaseStorage
+from .fake_supabase import FakeLatency, FakeSupabase
+
+def measure(storage: OcrStorage, ops: int, image_bytes: bytes) -> dict:
+    samples = {"upload_image": [], "insert_result": [], "get_result": [], "update_result": []}
+    for i in range(ops):
+        start = time.perf_counter()
+        image_url = storage.upload_image(f"bench_{i}.png", image_bytes + i.to_bytes(4, "little"), "image/png")
+        samples["upload_image"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        row = storage.insert_result({
+            "file_name": f"bench_{i}.png",
+            "extracted_text": "benchmark text " * 20,
+            "processed_at": datetime.now(timezone.utc).isoformat(),
+            "image_url": image_url,
+        })
+        samples["insert_result"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        storage.get_result(row["id"])
+        samples["get_result"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        storage.update_result(row["id"], {"extracted_text": "edited"})
+        samples["update_result"].append(time.perf_counter() - start)
+    return samples
+
+def report(label: str, samples: dict) -> None:
+    print(f"{label}:")
+    for op, values in samples.items():
+        ms = sorted(v * 1000 for v in values)
+        p95 = ms[max(0, int(len(ms) * 0.95) - 1)]
+        print(f"  {op:<14} median {statistics.median(ms):8.3f} ms   p95 {p95:8.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistence latency: local SQLite/files vs (simulated) Supabase.")
+    parser.add_argument("--ops", type=int, default=500)
+    parser.add_argument("--wan-latency-ms", type=float, default=60.0)
+    parser.add_argument("--image-kib", type=int, default=200)
+    args = parser.parse_args()
+
+    image_bytes = os.urandom(args.image_kib * 1024)
+    with tempfile.TemporaryDirectory(prefix="ocr_bench_storage_") as tmp_dir:
+        local = LocalStorage(tmp_dir, "http://127.0.0.1/ocr/images")
+        report("LocalStorage (SQLite WAL + content-addressed files)", measure(local, args.ops, image_bytes))
+
+    remote_ops = max(1, min(args.ops, int(5000 / max(args.wan_latency_ms, 1)))) # keep the run short
+    fake = FakeSupabase(db_latency=FakeLatency(args.wan_latency_ms), storage_latency=FakeLatency(args.wan_latency_ms))
+    report(f"SupabaseStorage over simulated WAN ({args.wan_latency_ms:.0f} ms, {remote_ops} ops)",
+           measure(SupabaseStorage(fake), remote_ops, image_bytes))
+
+if __name__ == "__main__":
+    main()
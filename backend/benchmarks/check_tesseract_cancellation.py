@@ -0,0 +1,83 @@
+# Regression check: large images with a cancellation token reach Tesseract whole
+#
+# Jalankan dari root proyek:
+#   python -m backend.benchmarks.check_tesseract_cancellation [--width 3508] [--height 2480]
+#
+# Memakai "tesseract" palsu (skrip Python) yang lambat membaca stdin, sehingga
+# pipe penuh sebelum seluruh PNM terkirim. Dengan token cancellation yang
+# deadline-nya longgar, image_to_data harus selesai dengan seluruh input; dengan
+# deadline pendek, proses harus dibunuh dan OcrCancelledError muncul tepat waktu.
+
+import argparse
+import os
+import stat
+import sys
+import tempfile
+import time
+import numpy as np
+import pytesseract
+from ..services import tesseract_runner
+from ..services.cancellation import OcrCancellation, OcrCancelledError
+
+# Reads stdin slowly, then reports how many bytes it got as the text of one TSV word
+FAKE_TESSERACT = """#!{python}
+import sys, time
+time.sleep({startup})
+received = 0
+while True:
+    chunk = sys.stdin.buffer.read(16384)
+    if not chunk:
+        break
+    received += len(chunk)
+    time.sleep(0.001)
+print("level\\tpage_num\\tblock_num\\tpar_num\\tline_num\\tword_num\\tleft\\ttop\\twidth\\theight\\tconf\\ttext")
+print(f"5\\t1\\t1\\t1\\t1\\t1\\t0\\t0\\t10\\t10\\t96\\t{{received}}")
+"""
+
+def install_fake_tesseract(directory: str, startup: float) -> str:
+    path = os.path.join(directory, "tesseract")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(FAKE_TESSERACT.format(python=sys.executable, startup=startup))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+def make_image(width: int, height: int) -> np.ndarray:
+    # Grayscale noise: PGM payload of width*height bytes, far beyond the pipe buffer
+    return np.random.default_rng(0).integers(1, 255, (height, width), dtype=np.uint8)
+
+def main():
+    parser = argparse.ArgumentParser(description="Cancellable image_to_data must deliver large images in full.")
+    parser.add_argument("--width", type=int, default=3508)
+    parser.add_argument("--height", type=int, default=2480)
+    args = parser.parse_args()
+
+    img = make_image(args.width, args.height)
+    expected = len(tesseract_runner.encode_pnm(img))
+    original_cmd = pytesseract.pytesseract.tesseract_cmd
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        pytesseract.pytesseract.tesseract_cmd = install_fake_tesseract(directory, startup=0.5)
+        try:
+            start = time.perf_counter()
+            data = tesseract_runner.image_to_data(img, cancellation=OcrCancellation(timeout_seconds=60))
+            elapsed = time.perf_counter() - start
+            received = int(data.text.iloc[0])
+            ok = received == expected
+            failures += not ok
+            print(f"{'OK  ' if ok else 'FAIL'} generous deadline: {received:,}/{expected:,} bytes in {elapsed:.2f} s")
+
+            start = time.perf_counter()
+            try:
+                tesseract_runner.image_to_data(img, cancellation=OcrCancellation(timeout_seconds=0.3))
+                ok, outcome = False, "completed"
+            except OcrCancelledError as e:
+                elapsed = time.perf_counter() - start
+                ok, outcome = elapsed < 0.3 + 1.0, f"{e.reason} after {elapsed:.2f} s"
+            failures += not ok
+            print(f"{'OK  ' if ok else 'FAIL'} short deadline: {outcome}")
+        finally:
+            pytesseract.pytesseract.tesseract_cmd = original_cmd
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
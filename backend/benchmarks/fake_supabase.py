@@ -0,0 +1,262 @@
+# In-process stand-in for the Supabase client used by ocr_service.py
+#
+# Hanya mendukung subset API yang benar-benar dipakai backend:
+#   table(...).select/insert/update/delete/eq/gte/lt/or_/order/range/limit/maybe_single/execute
+#   storage.from_(bucket).upload/remove/get_public_url
+# Setiap panggilan "jaringan" (execute, upload, remove) bisa diberi latensi buatan
+# supaya kita bisa mempelajari interaksi DB/storage yang lambat dengan worker OCR.
+
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+class FakeResponse:
+    """Mimics the supabase-py v2 APIResponse shape (only `.data` is read by the backend)."""
+    def __init__(self, data: Any):
+        self.data = data
+
+    def __repr__(self):
+        return f"FakeResponse(data={self.data!r})"
+
+class FakeLatency:
+    """Injected latency in milliseconds: base + uniform jitter."""
+    def __init__(self, base_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+
+    def sleep(self):
+        delay_ms = self.base_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+def _split_top_level(text: str) -> List[str]:
+    """Splits on commas outside double quotes and parentheses."""
+    parts, depth, quoted, current = [], 0, False, []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quoted and char == "\\":
+            current.append(text[i:i + 2])
+            i += 2
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            i += 1
+            continue
+        current.append(char)
+        i += 1
+    parts.append("".join(current))
+    return parts
+
+def parse_logic_tree(filters: str) -> List[tuple]:
+    """
+    Parses the body of a PostgREST or=(...) / and=(...) filter such as
+    'a.gt."1",and(a.eq."1",b.gt."2")' into (column, op, value) and (op, [children]) nodes.
+    """
+    nodes = []
+    for part in _split_top_level(filters):
+        for group in ("and", "or"):
+            if part.startswith(f"{group}(") and part.endswith(")"):
+                nodes.append((group, parse_logic_tree(part[len(group) + 1:-1])))
+                break
+        else:
+            column, op, value = part.split(".", 2)
+            if value.startswith('"') and value.endswith('"'):
+                value = value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+            nodes.append((column, op, value))
+    return nodes
+
+def _compare(cell: str, op: str, value: str) -> bool:
+    if op == "eq":
+        return cell == value
+    if op == "gt":
+        return cell > value
+    if op == "gte":
+        return cell >= value
+    if op == "lt":
+        return cell < value
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabase", table_name: str):
+        self._client = client
+        self._table_name = table_name
+        self._op = "select"
+        self._columns = "*"
+        self._payload: Optional[Dict[str, Any]] = None
+        self._filters: List[tuple] = []
+        self._orders: List[tuple] = []
+        self._range: Optional[tuple] = None
+        self._limit: Optional[int] = None
+        self._single = False
+
+    # --- Builder methods --- #
+    def select(self, columns: str = "*"):
+        self._op, self._columns = "select", columns
+        return self
+
+    def insert(self, payload: Dict[str, Any]):
+        self._op, self._payload = "insert", dict(payload)
+        return self
+
+    def update(self, payload: Dict[str, Any]):
+        self._op, self._payload = "update", dict(payload)
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    def eq(self, column: str, value: Any):
+        self._filters.append((column, "eq", str(value)))
+        return self
+
+    def gte(self, column: str, value: Any):
+        self._filters.append((column, "gte", str(value)))
+        return self
+
+    def lt(self, column: str, value: Any):
+        self._filters.append((column, "lt", str(value)))
+        return self
+
+    def or_(self, filters: str):
+        self._filters.append(("or", parse_logic_tree(filters)))
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self._orders.append((column, desc))
+        return self
+
+    def range(self, start: int, end: int):
+        self._range = (start, end)
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def maybe_single(self):
+        self._single = True
+        return self
+
+    # --- Execution --- #
+    def _test(self, row: Dict[str, Any], node: tuple) -> bool:
+        if node[0] in ("and", "or") and len(node) == 2:
+            results = (self._test(row, child) for child in node[1])
+            return all(results) if node[0] == "and" else any(results)
+        column, op, value = node
+        return _compare(str(row.get(column)), op, value)
+
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        return all(self._test(row, node) for node in self._filters)
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if self._columns.strip() == "*":
+            return dict(row)
+        return {column.strip(): row.get(column.strip()) for column in self._columns.split(",")}
+
+    def execute(self) -> FakeResponse:
+        self._client.db_latency.sleep()
+        with self._client.lock:
+            rows = self._client.tables.setdefault(self._table_name, {})
+            if self._op == "insert":
+                row = {"id": str(uuid.uuid4()), **self._payload}
+                rows[row["id"]] = row
+                return FakeResponse([dict(row)])
+
+            matched = [row for row in rows.values() if self._matches(row)]
+            if self._op == "update":
+                for row in matched:
+                    row.update(self._payload)
+                return FakeResponse([dict(row) for row in matched])
+            if self._op == "delete":
+                for row in matched:
+                    del rows[row["id"]]
+                return FakeResponse([dict(row) for row in matched])
+
+            # Stable sorts applied last-key-first give PostgREST's multi-column ordering
+            for column, desc in reversed(self._orders):
+                matched.sort(key=lambda row: row.get(column) or "", reverse=desc)
+            if self._range:
+                start, end = self._range
+                matched = matched[start:end + 1]
+            if self._limit is not None:
+                matched = matched[:self._limit]
+            data = [self._project(row) for row in matched]
+            if self._single:
+                return FakeResponse(data[0] if data else None)
+            return FakeResponse(data)
+
+class FakeBucket:
+    def __init__(self, client: "FakeSupabase", bucket_name: str):
+        self._client = client
+        self._bucket_name = bucket_name
+
+    def upload(self, path: str, file: bytes, file_options: Optional[Dict[str, str]] = None):
+        self._client.storage_latency.sleep()
+        with self._client.lock:
+            self._client.buckets.setdefault(self._bucket_name, {})[path] = bytes(file)
+        return {"Key": f"{self._bucket_name}/{path}"}
+
+    def remove(self, paths: List[str]):
+        self._client.storage_latency.sleep()
+        removed = []
+        with self._client.lock:
+            objects = self._client.buckets.setdefault(self._bucket_name, {})
+            for path in paths:
+                if objects.pop(path, None) is not None:
+                    removed.append({"name": path})
+        return removed
+
+    def get_public_url(self, path: str) -> str:
+        return f"{self._client.url}/storage/v1/object/public/{self._bucket_name}/{path}"
+
+class FakeStorage:
+    def __init__(self, client: "FakeSupabase"):
+        self._client = client
+
+    def from_(self, bucket_name: str) -> FakeBucket:
+        return FakeBucket(self._client, bucket_name)
+
+class FakeSupabase:
+    """Thread-safe in-memory replacement for supabase.Client."""
+    def __init__(
+        self,
+        db_latency: Optional[FakeLatency] = None,
+        storage_latency: Optional[FakeLatency] = None,
+        url: str = "http://fake-supabase.local",
+    ):
+        self.db_latency = db_latency or FakeLatency()
+        self.storage_latency = storage_latency or FakeLatency()
+        self.url = url
+        self.lock = threading.Lock()
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.buckets: Dict[str, Dict[str, bytes]] = {}
+        self.storage = FakeStorage(self)
+
+    def table(self, table_name: str) -> FakeQuery:
+        return FakeQuery(self, table_name)
+
+    def result_ids(self) -> List[str]:
+        with self.lock:
+            return list(self.tables.get("ocr_results", {}).keys())
+
+def seed_rows(storage, count: int) -> None:
+    """Pre-populates ocr_results through any OcrStorage so PUT/DELETE have rows to work on."""
+    for i in range(count):
+        storage.insert_result({
+            "file_name": f"seed_{i}.png",
+            "extracted_text": f"seeded result {i}",
+            "processed_at": datetime.now(timezone.utc).isoformat(),
+            "image_url": None,
+        })
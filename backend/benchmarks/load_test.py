@@ -0,0 +1,252 @@
+# End-to-end HTTP load test for backend.main:app against a local Supabase stand-in
+#
+# Jalankan dari root proyek, contoh:
+#   python -m backend.benchmarks.load_test --concurrency 16 --requests 500 \
+#       --mix upload=2,results=6,update=1,delete=1 --db-latency-ms 40 --storage-latency-ms 120
+#
+# Aplikasi FastAPI dijalankan di uvicorn (thread terpisah, port lokal) dengan
+# dependency get_storage diganti SupabaseStorage(FakeSupabase) atau, dengan
+# --storage local, LocalStorage (SQLite + file) di direktori sementara,
+# lalu di-drive lewat HTTP sungguhan.
+# Tanpa executable tesseract, gunakan --ocr-stub-ms untuk mensimulasikan durasi OCR.
+
+import argparse
+import asyncio
+import random
+import socket
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+import anyio
+import cv2
+import httpx
+import numpy as np
+import pandas as pd
+import uvicorn
+from ..dependencies import get_storage
+from ..main import app
+from ..services import tesseract_runner
+from ..storage.local_storage import LocalStorage
+from ..storage.supabase_storage import SupabaseStorage
+from .fake_supabase import FakeLatency, FakeSupabase, seed_rows
+
+ENDPOINTS = ("upload", "results", "detail", "update", "delete")
+
+# --- Helpers --- #
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """'upload=2,results=6' -> {'upload': 2, 'results': 6}"""
+    weights: Dict[str, int] = {}
+    for part in mix.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: {name!r} (choose from {', '.join(ENDPOINTS)})")
+        weights[name] = int(weight or 1)
+    if not weights:
+        raise SystemExit("--mix must name at least one endpoint")
+    return weights
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_samples))))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+def make_upload_png(width: int = 1200, height: int = 800) -> bytes:
+    page = np.full((height, width), 255, dtype=np.uint8)
+    for i, y in enumerate(range(60, height - 20, 44)):
+        cv2.putText(page, f"load test line {i} lorem ipsum dolor", (40, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2, cv2.LINE_AA)
+    ok, encoded = cv2.imencode(".png", page)
+    assert ok
+    return encoded.tobytes()
+
+def install_ocr_stub(delay_ms: float) -> None:
+    """Replaces the Tesseract call with a fixed-duration stub (for machines without tesseract)."""
+    def fake_image_to_data(img, config: str = "", cancellation=None) -> pd.DataFrame:
+        time.sleep(delay_ms / 1000)
+        return pd.DataFrame({
+            "text": ["load", "test"], "conf": [95.0, 95.0],
+            "left": [10, 80], "top": [10, 10], "width": [60, 60], "height": [20, 20],
+        })
+    tesseract_runner.image_to_data = fake_image_to_data
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# --- Server --- #
+
+class ServerThread(threading.Thread):
+    """Runs uvicorn in a daemon thread with its own event loop."""
+    def __init__(self, port: int, threadpool_size: int):
+        super().__init__(daemon=True)
+        self.threadpool_size = threadpool_size
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+
+    def run(self):
+        async def serve():
+            if self.threadpool_size:
+                anyio.to_thread.current_default_thread_limiter().total_tokens = self.threadpool_size
+            await self.server.serve()
+        asyncio.run(serve())
+
+    def wait_started(self, timeout: float = 15.0):
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.is_alive():
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.join(timeout=10)
+
+# --- Load Generator --- #
+
+class LoadRunner:
+    def __init__(self, client: httpx.AsyncClient, list_ids: Callable[[], List[str]], weights: Dict[str, int], upload_png: bytes):
+        self.client = client
+        self.list_ids = list_ids
+        self.names = list(weights.keys())
+        self.weights = list(weights.values())
+        self.upload_png = upload_png
+        self.claimed_for_delete = set()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def pick_result_id(self, for_delete: bool = False):
+        candidates = [rid for rid in self.list_ids() if rid not in self.claimed_for_delete]
+        if not candidates:
+            return None
+        result_id = random.choice(candidates)
+        if for_delete:
+            self.claimed_for_delete.add(result_id)
+        return result_id
+
+    async def one_request(self, name: str) -> Tuple[int, float]:
+        start = time.perf_counter()
+        if name == "upload":
+            response = await self.client.post(
+                "/ocr/upload",
+                files={"file": ("load.png", self.upload_png, "image/png")},
+                data={"languages": ["eng"], "save_result": "true", "image_type": "default"},
+            )
+        elif name == "results":
+            response = await self.client.get("/ocr/results")
+        elif name == "detail":
+            result_id = self.pick_result_id()
+            if result_id is None:
+                return 0, 0.0
+            start = time.perf_counter()
+            response = await self.client.get(f"/ocr/results/{result_id}")
+        elif name == "update":
+            result_id = self.pick_result_id()
+            if result_id is None:
+                return 0, 0.0
+            start = time.perf_counter()
+            response = await self.client.put(f"/ocr/results/{result_id}",
+                                             data={"extracted_text": "updated by load test"})
+        else:
+            result_id = self.pick_result_id(for_delete=True)
+            if result_id is None:
+                return 0, 0.0
+            start = time.perf_counter()
+            response = await self.client.delete(f"/ocr/results/{result_id}")
+        return response.status_code, (time.perf_counter() - start) * 1000
+
+    async def worker(self, remaining: List[int]):
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            name = random.choices(self.names, weights=self.weights)[0]
+            try:
+                status, elapsed_ms = await self.one_request(name)
+            except httpx.HTTPError as e:
+                status, elapsed_ms = -1, 0.0
+                print(f"{name}: transport error {e!r}")
+            if status == 0:
+                continue # nothing to update/delete yet
+            self.statuses[name][status] += 1
+            self.latencies[name].append(elapsed_ms)
+
+    def report(self, wall_seconds: float):
+        print(f"\n{'endpoint':<9} {'count':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        all_samples: List[float] = []
+        for name in self.names:
+            samples = sorted(self.latencies.get(name, []))
+            all_samples.extend(samples)
+            errors = sum(count for status, count in self.statuses[name].items() if status < 200 or status >= 400)
+            print(f"{name:<9} {len(samples):>6} {errors:>6} {len(samples) / wall_seconds:>8.1f} "
+                  f"{percentile(samples, 50):>9.1f} {percentile(samples, 95):>9.1f} {percentile(samples, 99):>9.1f}")
+        all_samples.sort()
+        print(f"{'total':<9} {len(all_samples):>6} {'':>6} {len(all_samples) / wall_seconds:>8.1f} "
+              f"{percentile(all_samples, 50):>9.1f} {percentile(all_samples, 95):>9.1f} {percentile(all_samples, 99):>9.1f}")
+        for name in self.names:
+            print(f"  {name} status codes: {dict(self.statuses[name])}")
+
+async def drive(base_url: str, list_ids: Callable[[], List[str]], args) -> None:
+    weights = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        runner = LoadRunner(client, list_ids, weights, make_upload_png())
+        remaining = [args.requests]
+        start = time.perf_counter()
+        await asyncio.gather(*(runner.worker(remaining) for _ in range(args.concurrency)))
+        runner.report(time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test for the OCR API with a fake Supabase backend.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="total requests across all workers")
+    parser.add_argument("--mix", default="upload=2,results=6,update=1,delete=1")
+    parser.add_argument("--storage", choices=["fake", "local"], default="fake",
+                        help="fake: FakeSupabase with injected latency; local: SQLite + files in a temp dir")
+    parser.add_argument("--seed-rows", type=int, default=200)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--db-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--storage-latency-ms", type=float, default=0.0)
+    parser.add_argument("--storage-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--ocr-stub-ms", type=float, default=None,
+                        help="replace Tesseract with a stub that sleeps this long")
+    parser.add_argument("--threadpool-size", type=int, default=0,
+                        help="override the anyio worker thread limit (default 40)")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    if args.storage == "local":
+        local_dir = tempfile.TemporaryDirectory(prefix="ocr_load_test_")
+        storage = LocalStorage(local_dir.name, "http://127.0.0.1/ocr/images")
+        seed_rows(storage, args.seed_rows)
+        list_ids = lambda: [row["id"] for row in storage.list_results()]
+        backend_label = f"LocalStorage ({local_dir.name})"
+    else:
+        fake = FakeSupabase()
+        storage = SupabaseStorage(fake)
+        seed_rows(storage, args.seed_rows) # seeded before latency is injected
+        fake.db_latency = FakeLatency(args.db_latency_ms, args.db_jitter_ms)
+        fake.storage_latency = FakeLatency(args.storage_latency_ms, args.storage_jitter_ms)
+        list_ids = fake.result_ids
+        backend_label = f"FakeSupabase (db {args.db_latency_ms}ms, storage {args.storage_latency_ms}ms)"
+    app.dependency_overrides[get_storage] = lambda: storage
+    if args.ocr_stub_ms is not None:
+        install_ocr_stub(args.ocr_stub_ms)
+
+    port = free_port()
+    server = ServerThread(port, args.threadpool_size)
+    server.start()
+    try:
+        server.wait_started()
+        print(f"Serving backend.main:app on 127.0.0.1:{port} with {backend_label}")
+        asyncio.run(drive(f"http://127.0.0.1:{port}", list_ids, args))
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from fastapi import HTTPException
 from pathlib import Path
 import logging
 from typing import Union, Optional
+from .storage.base import OcrStorage
 
 # --- Define Paths --- #
 # Path to the directory containing this file
@@ -66,4 +67,32 @@ def get_supabase_client() -> Client:
         # This handles the case where client creation failed earlier
         # or was skipped due to missing env vars.
         raise RuntimeError("Supabase client is not initialized. Check environment variables and logs.")
-    return supabase 
\ No newline at end of file
+    return supabase
+
+# --- Storage Backend Selection --- #
+# STORAGE_BACKEND=supabase (default) uses the Supabase table/bucket above.
+# STORAGE_BACKEND=local uses SQLite (WAL) + content-addressed files under LOCAL_STORAGE_DIR,
+# with images served by this API at LOCAL_IMAGE_BASE_URL (GET /ocr/images/{name}).
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "supabase").strip().lower()
+LOCAL_STORAGE_DIR = Path(os.environ.get("LOCAL_STORAGE_DIR", str(backend_dir / 'local_data')))
+LOCAL_IMAGE_BASE_URL = os.environ.get("LOCAL_IMAGE_BASE_URL", "http://localhost:8000/ocr/images")
+
+_storage: Optional[OcrStorage] = None
+
+def create_storage(backend: str = STORAGE_BACKEND) -> OcrStorage:
+    """Builds the configured storage backend."""
+    if backend == "local":
+        from .storage.local_storage import LocalStorage
+        return LocalStorage(LOCAL_STORAGE_DIR, LOCAL_IMAGE_BASE_URL)
+    if backend == "supabase":
+        from .storage.supabase_storage import SupabaseStorage
+        return SupabaseStorage(get_supabase_client())
+    raise RuntimeError(f"Unknown STORAGE_BACKEND '{backend}'. Use 'supabase' or 'local'.")
+
+def get_storage() -> OcrStorage:
+    """Dependency function to get the configured result/image storage backend."""
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+        print(f"Using storage backend: {STORAGE_BACKEND}")
+    return _storage
@@ -1,6 +1,8 @@
 # Placeholder for FastAPI app 
 from fastapi import FastAPI
 from .routers import ocr_routes
+from .services import metrics
+from .services.result_cache import cache as result_cache, word_box_cache
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import os
@@ -45,6 +47,11 @@ app.include_router(ocr_routes.router, prefix="/ocr", tags=["OCR"])
 def read_root():
     return {"message": "Welcome to the Tesseract OCR API"}
 
+@app.get("/metrics", tags=["Metrics"])
+def read_metrics():
+    """In-process counters (OCR requests, cancellations, timeouts, skipped saves, result cache)."""
+    return {**metrics.snapshot(), **result_cache.stats(), **word_box_cache.stats()}
+
 # --- How to Run --- #
 # 1. Ensure you are in the 'backend' directory in your terminal.
 # 2. Make sure your virtual environment (.venv) is activated.
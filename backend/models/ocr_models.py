@@ -11,6 +11,7 @@ class WordData(BaseModel):
     width: int
     height: int
     confidence: Optional[float] = None # Make confidence optional
+    line: Optional[int] = None # Sequential text line number in reading order
 
     class Config:
         populate_by_name = True # Allow using alias 'conf'
@@ -45,6 +46,13 @@ class DbOcrResult(BaseModel):
     class Config:
         orm_mode = True # Enable ORM mode for compatibility if needed
 
+# Model for words returned by a region/line query on a saved result
+class WordRegionResponse(BaseModel):
+    result_id: str
+    processed_image_width: int
+    processed_image_height: int
+    words: List[WordData]
+
 # Model for updating an OCR result
 class OcrResultUpdateRequest(BaseModel):
     extracted_text: Optional[str] = None
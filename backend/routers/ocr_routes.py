@@ -1,11 +1,14 @@
 # Placeholder for OCR routes
 
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Form, BackgroundTasks
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Form, BackgroundTasks, Query, Request, Header
+from fastapi.responses import StreamingResponse, FileResponse
 from typing import List, Optional, Dict, Any
-from supabase import Client
+from datetime import datetime
 from ..services import ocr_service
-from ..dependencies import get_supabase_client
-from ..models.ocr_models import OcrResultResponse, DbOcrResult, OcrResultUpdateRequest
+from ..services.cancellation import OcrCancellation
+from ..dependencies import get_storage
+from ..storage.base import OcrStorage
+from ..models.ocr_models import OcrResultResponse, DbOcrResult, OcrResultUpdateRequest, WordRegionResponse
 import traceback
 
 # Router ini tidak perlu prefix sendiri karena prefix sudah ditambahkan di main.py saat include_router
@@ -16,18 +19,23 @@ router = APIRouter(
 
 @router.post("/upload", response_model=ocr_service.OcrResultWithBoxes)
 async def upload_image_for_ocr(
+    request: Request,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     languages: Optional[List[str]] = Form(None),
     save_result: bool = Form(True),
     image_type: str = Form("default"),
-    supabase_client: Client = Depends(get_supabase_client)
+    quality: Optional[str] = Form(None, description="'fast', 'balanced' (default), atau 'best'"),
+    x_ocr_timeout: Optional[float] = Header(None, description="Batas waktu OCR (detik), dibatasi oleh default server"),
+    storage: OcrStorage = Depends(get_storage)
 ):
     """
     Menerima file gambar, melakukan OCR dengan bahasa terpilih,
     secara opsional menyimpan hasil lengkap di background, dan mengembalikan data tingkat kata.
     Bahasa: 'languages=eng&languages=ind'
     Tipe Gambar: 'image_type=default' atau 'image_type=chat'
+    Kualitas: 'quality=fast' (interaktif), 'quality=balanced' (default), 'quality=best' (arsip)
+    Header opsional 'X-OCR-Timeout' mempersingkat batas waktu pemrosesan (504 jika terlampaui).
     """
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Tipe file tidak valid. Harap unggah gambar.")
@@ -39,7 +47,7 @@ async def upload_image_for_ocr(
         if not selected_languages:
              selected_languages = ["eng", "ind"]
 
-    print(f"Menerima bahasa: {languages}, Tipe Gambar: {image_type}, Simpan hasil: {save_result}")
+    print(f"Menerima bahasa: {languages}, Tipe Gambar: {image_type}, Kualitas: {quality or 'default'}, Simpan hasil: {save_result}")
 
     try:
         # Call service without psm/whitelist
@@ -48,8 +56,11 @@ async def upload_image_for_ocr(
             languages=selected_languages,
             save_to_db_flag=save_result,
             background_tasks=background_tasks,
-            supabase_client=supabase_client,
-            image_type=image_type
+            storage=storage,
+            image_type=image_type,
+            request=request,
+            cancellation=OcrCancellation(ocr_service.resolve_ocr_timeout(x_ocr_timeout)),
+            quality=quality
         )
         return ocr_result
     except HTTPException as e:
@@ -58,39 +69,171 @@ async def upload_image_for_ocr(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan tak terduga: {e}")
 
+@router.post("/upload/sequence", response_model=ocr_service.OcrSequenceResult)
+async def upload_image_sequence_for_ocr(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    languages: Optional[List[str]] = Form(None),
+    save_result: bool = Form(True),
+    image_type: str = Form("chat"),
+    quality: Optional[str] = Form(None, description="'fast', 'balanced' (default), atau 'best'"),
+    x_ocr_timeout: Optional[float] = Header(None, description="Batas waktu OCR (detik), dibatasi oleh default server"),
+    storage: OcrStorage = Depends(get_storage)
+):
+    """
+    Menerima beberapa screenshot berurutan dari percakapan yang sama (urutan 'files' = urutan frame).
+    Offset scroll dan area yang berubah dideteksi antar frame; hanya area baru yang di-OCR.
+    Mengembalikan satu transkrip tanpa duplikasi beserta kotak kata per frame.
+    """
+    if any(not (file.content_type or "").startswith("image/") for file in files):
+        raise HTTPException(status_code=400, detail="Tipe file tidak valid. Semua frame harus berupa gambar.")
+
+    selected_languages = [lang.strip().lower() for lang in languages or [] if lang.strip()] or ["eng", "ind"]
+    print(f"Menerima sequence {len(files)} frame, bahasa: {selected_languages}, Tipe Gambar: {image_type}, Simpan hasil: {save_result}")
+
+    try:
+        return await ocr_service.perform_sequence_ocr(
+            files=files,
+            languages=selected_languages,
+            save_to_db_flag=save_result,
+            background_tasks=background_tasks,
+            storage=storage,
+            image_type=image_type,
+            request=request,
+            cancellation=OcrCancellation(ocr_service.resolve_ocr_timeout(x_ocr_timeout)),
+            quality=quality
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Terjadi kesalahan tak terduga: {e}")
+
 @router.get("/results", response_model=List[DbOcrResult])
 async def get_ocr_results(
-    supabase_client: Client = Depends(get_supabase_client)
+    storage: OcrStorage = Depends(get_storage)
 ):
     """
-    Mengambil semua hasil OCR yang tersimpan dari database Supabase,
+    Mengambil semua hasil OCR yang tersimpan dari storage backend (Supabase atau lokal),
     diurutkan berdasarkan waktu pemrosesan terbaru.
+    Hasil disajikan dari cache in-process selama TTL singkat.
     """
     try:
-        response = supabase_client.table('ocr_results') \
-                                .select('*') \
-                                .order('processed_at', desc=True) \
-                                .execute()
-        
-        # supabase-py v1 returns data directly in response.data
-        # supabase-py v2 returns data in response.data
-        # Let's assume v2 structure for now based on common usage
-        if hasattr(response, 'data'):
-             # Validate data with Pydantic
-            results = [DbOcrResult.model_validate(item) for item in response.data]
-            return results
-        else:
-             print("Supabase response structure unexpected:", response)
-             raise HTTPException(status_code=500, detail="Gagal memproses data dari database.")
-
+        rows = await ocr_service.fetch_results(storage)
+        # Validate data with Pydantic
+        return [DbOcrResult.model_validate(item) for item in rows]
+    except HTTPException as e:
+        raise e
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Gagal mengambil hasil dari database: {e}") 
 
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+@router.get("/results/export")
+async def export_ocr_results(
+    format: str = Query("ndjson", description="'ndjson' atau 'csv'"),
+    processed_from: Optional[datetime] = Query(None, description="Batas bawah processed_at (inklusif)"),
+    processed_to: Optional[datetime] = Query(None, description="Batas atas processed_at (eksklusif)"),
+    gzip: bool = Query(False, description="Kompres hasil ekspor dengan gzip"),
+    storage: OcrStorage = Depends(get_storage)
+):
+    """
+    Mengekspor riwayat OCR sebagai NDJSON atau CSV secara streaming.
+    Data dibaca dari database per halaman dan langsung ditulis ke response,
+    sehingga penggunaan memori tetap konstan berapa pun jumlah barisnya.
+    """
+    export_format = format.strip().lower()
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Format ekspor tidak valid. Gunakan 'ndjson' atau 'csv'.")
+    # Compare in UTC: one naive and one aware bound can't be compared directly
+    processed_from, processed_to = ocr_service.to_utc(processed_from), ocr_service.to_utc(processed_to)
+    if processed_from and processed_to and processed_from >= processed_to:
+        raise HTTPException(status_code=400, detail="processed_from harus lebih awal dari processed_to.")
+
+    filename = f"ocr_results.{export_format}"
+    media_type = EXPORT_MEDIA_TYPES[export_format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        ocr_service.stream_results_export(
+            storage,
+            export_format=export_format,
+            processed_from=processed_from,
+            processed_to=processed_to,
+            gzip_output=gzip
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/results/{result_id}", response_model=DbOcrResult)
+async def get_ocr_result(
+    result_id: str,
+    storage: OcrStorage = Depends(get_storage)
+):
+    """
+    Mengambil satu hasil OCR berdasarkan ID (disajikan dari cache jika tersedia).
+    """
+    try:
+        row = await ocr_service.fetch_result(storage, result_id)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Gagal mengambil hasil dari database: {e}")
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Hasil dengan ID {result_id} tidak ditemukan.")
+    return DbOcrResult.model_validate(row)
+
+@router.get("/results/{result_id}/words", response_model=WordRegionResponse)
+async def get_ocr_result_words(
+    result_id: str,
+    left: Optional[int] = Query(None, description="Batas kiri persegi (piksel gambar terproses)"),
+    top: Optional[int] = Query(None, description="Batas atas persegi"),
+    right: Optional[int] = Query(None, description="Batas kanan persegi (eksklusif)"),
+    bottom: Optional[int] = Query(None, description="Batas bawah persegi (eksklusif)"),
+    line: Optional[int] = Query(None, ge=0, description="Nomor baris (0 = baris pertama)"),
+    contained: bool = Query(False, description="Hanya kata yang seluruhnya berada di dalam persegi"),
+    storage: OcrStorage = Depends(get_storage)
+):
+    """
+    Mengembalikan kata-kata dari hasil OCR tersimpan yang berada di dalam persegi
+    (left, top, right, bottom) dan/atau pada satu baris, tanpa menjalankan OCR ulang.
+    Kotak kata didekode sekali per hasil lalu di-cache; pencarian area memindai kolomnya (NumPy).
+    """
+    rect_params = (left, top, right, bottom)
+    has_rect = all(value is not None for value in rect_params)
+    if any(value is not None for value in rect_params) and not has_rect:
+        raise HTTPException(status_code=400, detail="Persegi membutuhkan left, top, right, dan bottom sekaligus.")
+    if not has_rect and line is None:
+        raise HTTPException(status_code=400, detail="Berikan persegi (left, top, right, bottom) atau nomor baris (line).")
+    if has_rect and (right <= left or bottom <= top):
+        raise HTTPException(status_code=400, detail="Persegi tidak valid: right harus > left dan bottom harus > top.")
+
+    try:
+        result = await ocr_service.query_words(
+            storage, result_id, rect=rect_params if has_rect else None, line=line, contained=contained
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Gagal mengambil kotak kata: {e}")
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Kotak kata untuk hasil dengan ID {result_id} tidak ditemukan.")
+    return result
+
 @router.delete("/results/{result_id}", status_code=204) # 204 No Content is typical for successful DELETE
 async def delete_ocr_result(
     result_id: str,
-    supabase_client: Client = Depends(get_supabase_client)
+    storage: OcrStorage = Depends(get_storage)
 ):
     """
     Menghapus hasil OCR dari database berdasarkan ID.
@@ -98,7 +241,7 @@ async def delete_ocr_result(
     """
     try:
         # The service function now handles image deletion from storage as well
-        await ocr_service.delete_result_from_db(supabase_client, result_id)
+        await ocr_service.delete_result_from_db(storage, result_id)
         return None 
     except HTTPException as e:
         raise e
@@ -112,7 +255,7 @@ async def update_ocr_result_entry(
     extracted_text: Optional[str] = Form(None),
     file_name: Optional[str] = Form(None),
     new_image_file: Optional[UploadFile] = File(None),
-    supabase_client: Client = Depends(get_supabase_client)
+    storage: OcrStorage = Depends(get_storage)
 ):
     """
     Memperbarui hasil OCR yang ada (teks, nama file, dan/atau gambar).
@@ -125,7 +268,7 @@ async def update_ocr_result_entry(
         )
         
         updated_result_dict = await ocr_service.update_ocr_result(
-            supabase_client=supabase_client,
+            storage=storage,
             result_id=result_id,
             update_data=update_data_payload,
             new_file=new_image_file
@@ -135,4 +278,19 @@ async def update_ocr_result_entry(
         raise e
     except Exception as e:
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Terjadi kesalahan tak terduga saat memperbarui hasil: {e}") 
+        raise HTTPException(status_code=500, detail=f"Terjadi kesalahan tak terduga saat memperbarui hasil: {e}")
+
+@router.get("/images/{image_name}")
+async def get_local_image(
+    image_name: str,
+    storage: OcrStorage = Depends(get_storage)
+):
+    """
+    Menyajikan gambar yang disimpan oleh storage backend lokal (STORAGE_BACKEND=local).
+    Untuk Supabase, gambar disajikan langsung dari bucket sehingga endpoint ini mengembalikan 404.
+    """
+    image_path = storage.local_image_path(image_name)
+    if image_path is None:
+        raise HTTPException(status_code=404, detail="Gambar tidak ditemukan.")
+    # Content-addressed: isi file untuk nama yang sama tidak pernah berubah
+    return FileResponse(image_path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
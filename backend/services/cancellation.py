@@ -0,0 +1,41 @@
+# Per-request cancellation for OCR work (deadline + client disconnect)
+
+import threading
+import time
+from typing import Optional
+
+REASON_DEADLINE = "deadline_exceeded"
+REASON_DISCONNECT = "client_disconnected"
+
+class OcrCancelledError(Exception):
+    """Raised when OCR work is abandoned because of a deadline or client disconnect."""
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class OcrCancellation:
+    """
+    Shared between the request coroutine and the worker thread running Tesseract.
+    The coroutine cancels it on disconnect; the deadline is checked lazily by anyone polling.
+    """
+    def __init__(self, timeout_seconds: Optional[float] = None):
+        self.deadline = time.monotonic() + timeout_seconds if timeout_seconds else None
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock() # cancel() runs on the event loop and in worker threads
+
+    def cancel(self, reason: str) -> None:
+        """First reason wins; later calls don't relabel an already cancelled token."""
+        with self._lock:
+            if not self._event.is_set():
+                self.reason = reason
+                self._event.set()
+
+    def is_cancelled(self) -> bool:
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(REASON_DEADLINE)
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.is_cancelled():
+            raise OcrCancelledError(self.reason)
@@ -0,0 +1,242 @@
+# Frame differencing for bursts of scrolling screenshots
+#
+# Screenshot berurutan dari percakapan chat yang sama sebagian besar berisi
+# piksel yang berulang. Modul ini (tanpa Tesseract) memperkirakan offset scroll
+# vertikal antar frame, menandai baris yang hanya bergeser (scrolled), yang
+# tidak bergerak (static: header/footer aplikasi), dan yang baru/berubah,
+# lalu menyusun potongan baru tersebut ke satu kanvas (montage) sehingga OCR
+# hanya dijalankan sekali untuk konten baru.
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+ROW_NEW = 0
+ROW_SCROLLED = 1
+ROW_STATIC = 2
+
+MIN_MATCHED_ROWS = 8 # Absolute minimum of matching ink rows to accept a scroll offset
+MIN_MATCH_FRACTION = 0.1 # ...and as a fraction of the frame's ink rows
+MAX_HASH_REPEATS = 8 # Rows repeated more often than this (borders, separators) don't vote
+MAX_CANDIDATES = 5
+BAND_MARGIN = 4 # Rows of context added around every changed band
+BAND_MERGE_GAP = 8 # Bands closer than this are OCR'd as one
+LINE_EXPANSION_LIMIT = 96 # Max rows a band grows to reach a quiet row (whole text line)
+MONTAGE_GAP = 32 # Blank rows between bands on the montage canvas
+MONTAGE_MAX_HEIGHT = 8000 # Larger montages are split over several Tesseract calls
+
+def row_tolerance(width: int) -> int:
+    """Differing pixels a row may have and still count as 'the same row' (noise, scrollbar)."""
+    return max(2, width // 100)
+
+class Frame:
+    """A preprocessed frame plus its per-row ink counts (computed once, reused by every comparison)."""
+    def __init__(self, pixels: np.ndarray):
+        self.pixels = pixels
+        self.height, self.width = pixels.shape[:2]
+        background = 255 if pixels.mean() >= 128 else 0 # light or dark theme
+        self.row_ink = np.count_nonzero(pixels != background, axis=1)
+
+    def quiet_rows(self, tolerance: int) -> np.ndarray:
+        return self.row_ink <= tolerance
+
+def matching_rows(prev: Frame, curr: Frame, offset: int, tolerance: int) -> np.ndarray:
+    """
+    Rows y of `curr` that equal row y + offset of `prev`. The tolerance shrinks for sparse
+    rows so a row with a few dots (accents, descender tips) never "matches" a blank one.
+    """
+    height = curr.height
+    matched = np.zeros(height, dtype=bool)
+    start, end = max(0, -offset), min(height, height - offset)
+    if end <= start:
+        return matched
+    differing = np.count_nonzero(curr.pixels[start:end] != prev.pixels[start + offset:end + offset], axis=1)
+    allowed = np.minimum(tolerance, curr.row_ink[start:end] // 4)
+    matched[start:end] = differing <= allowed
+    return matched
+
+def _hash_votes(prev: Frame, curr: Frame, tolerance: int) -> Counter:
+    """Offsets proposed by rows whose exact content appears in both frames."""
+    positions: Dict[bytes, List[int]] = {}
+    for y in np.flatnonzero(~prev.quiet_rows(tolerance)):
+        positions.setdefault(prev.pixels[y].tobytes(), []).append(int(y))
+    votes: Counter = Counter()
+    for y in np.flatnonzero(~curr.quiet_rows(tolerance)):
+        matches = positions.get(curr.pixels[y].tobytes())
+        if matches and len(matches) <= MAX_HASH_REPEATS:
+            votes.update(p - int(y) for p in matches)
+    return votes
+
+def _profile_candidates(prev: Frame, curr: Frame, min_overlap: int) -> List[int]:
+    """Fallback for lossy frames: offsets where the per-row ink profiles line up best."""
+    prev_profile, curr_profile = prev.row_ink.astype(np.int64), curr.row_ink.astype(np.int64)
+    height = curr.height
+    costs = []
+    for offset in range(-(height - min_overlap), height - min_overlap + 1):
+        start, end = max(0, -offset), min(height, height - offset)
+        costs.append((np.abs(curr_profile[start:end] - prev_profile[start + offset:end + offset]).mean(), offset))
+    costs.sort()
+    return [offset for _, offset in costs[:MAX_CANDIDATES]]
+
+def estimate_scroll(prev: Frame, curr: Frame) -> Optional[int]:
+    """
+    Vertical scroll between two frames: row y of `curr` shows row y + offset of `prev`
+    (positive = content moved up, i.e. the user scrolled down). None if the frames don't overlap.
+    """
+    tolerance = row_tolerance(curr.width)
+    curr_ink = ~curr.quiet_rows(tolerance)
+    ink_rows = int(np.count_nonzero(curr_ink))
+    if ink_rows == 0:
+        return 0
+
+    votes = _hash_votes(prev, curr, tolerance)
+    candidates = [offset for offset, _ in votes.most_common(MAX_CANDIDATES)]
+    if not candidates:
+        candidates = _profile_candidates(prev, curr, min_overlap=max(MIN_MATCHED_ROWS, curr.height // 10))
+
+    best_offset, best_score = None, -1
+    for offset in [0, *candidates]: # 0 first: ties keep "no scroll"
+        score = int(np.count_nonzero(matching_rows(prev, curr, offset, tolerance) & curr_ink))
+        if score > best_score:
+            best_offset, best_score = offset, score
+    if best_score < max(MIN_MATCHED_ROWS, MIN_MATCH_FRACTION * ink_rows):
+        return None
+    return best_offset
+
+def label_rows(prev: Frame, curr: Frame, offset: Optional[int]) -> np.ndarray:
+    """ROW_SCROLLED / ROW_STATIC / ROW_NEW for every row of `curr`."""
+    labels = np.full(curr.height, ROW_NEW, dtype=np.uint8)
+    if offset is None:
+        return labels
+    tolerance = row_tolerance(curr.width)
+    scrolled = matching_rows(prev, curr, offset, tolerance)
+    labels[scrolled] = ROW_SCROLLED
+    if offset != 0:
+        # Only rows with ink: blank rows match at offset 0 by coincidence anywhere on the page
+        static = matching_rows(prev, curr, 0, tolerance) & ~scrolled & ~curr.quiet_rows(0)
+        labels[static] = ROW_STATIC
+    return labels
+
+def vanished_rows(prev: Frame, curr: Frame, offset: Optional[int], labels: np.ndarray) -> np.ndarray:
+    """New rows of `curr` that are blank where the previous frame had ink (edited/deleted content)."""
+    height = curr.height
+    vanished = np.zeros(height, dtype=bool)
+    if offset is None:
+        return vanished
+    tolerance = row_tolerance(curr.width)
+    prev_ink = ~prev.quiet_rows(tolerance)
+    start, end = max(0, -offset), min(height, height - offset)
+    if end > start:
+        vanished[start:end] = prev_ink[start + offset:end + offset]
+    if offset != 0:
+        vanished &= prev_ink # blank in both frames at this row: fixed empty space, not an edit
+    return vanished & (labels == ROW_NEW) & curr.quiet_rows(tolerance)
+
+def changed_bands(curr: Frame, labels: np.ndarray, vanished: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
+    """
+    Row ranges [top, bottom) to OCR: new rows that contain ink (or lost it), grown to the
+    nearest empty rows so that text lines cut by the previous frame's edge are read whole.
+    """
+    height = curr.height
+    new_ink = (labels == ROW_NEW) & ~curr.quiet_rows(row_tolerance(curr.width))
+    if vanished is not None:
+        new_ink |= vanished
+    # Grow to truly empty rows: sparse rows (descenders, accents) still belong to the line
+    quiet = curr.quiet_rows(0)
+    bands: List[Tuple[int, int]] = []
+    y = 0
+    while y < height:
+        if not new_ink[y]:
+            y += 1
+            continue
+        top = y
+        while y < height and new_ink[y]:
+            y += 1
+        bottom = y
+        limit = top - LINE_EXPANSION_LIMIT
+        while top > 0 and top > limit and not quiet[top - 1]:
+            top -= 1
+        limit = bottom + LINE_EXPANSION_LIMIT
+        while bottom < height and bottom < limit and not quiet[bottom]:
+            bottom += 1
+        top, bottom = max(0, top - BAND_MARGIN), min(height, bottom + BAND_MARGIN)
+        if bands and top - bands[-1][1] <= BAND_MERGE_GAP:
+            bands[-1] = (bands[-1][0], max(bands[-1][1], bottom))
+        else:
+            bands.append((top, bottom))
+        y = max(y, bottom)
+    return bands
+
+class FramePlan:
+    """What to reuse and what to OCR for one frame of a sequence."""
+    def __init__(self, index: int, scroll_offset: Optional[int], document_offset: int,
+                 labels: np.ndarray, bands: List[Tuple[int, int]]):
+        self.index = index
+        self.scroll_offset = scroll_offset # None = no overlap with the previous frame
+        self.document_offset = document_offset # Row of the stitched document shown at frame row 0
+        self.labels = labels
+        self.bands = bands
+
+    @property
+    def is_cut(self) -> bool:
+        return self.scroll_offset is None
+
+def plan_sequence(images: List[np.ndarray]) -> List[FramePlan]:
+    """Scroll offsets, row labels and bands to OCR for an ordered list of same-sized frames."""
+    frames = [Frame(image) for image in images]
+    plans: List[FramePlan] = []
+    document_bottom = 0
+    for index, curr in enumerate(frames):
+        if index == 0:
+            offset, document_offset = None, 0
+            labels = np.full(curr.height, ROW_NEW, dtype=np.uint8)
+            vanished = None
+        else:
+            prev = frames[index - 1]
+            offset = estimate_scroll(prev, curr)
+            labels = label_rows(prev, curr, offset)
+            vanished = vanished_rows(prev, curr, offset, labels)
+            # A cut starts a new section below everything seen so far
+            document_offset = document_bottom if offset is None else plans[-1].document_offset + offset
+        bands = changed_bands(curr, labels, vanished)
+        for top, bottom in bands:
+            labels[top:bottom] = ROW_NEW
+        plans.append(FramePlan(index, offset, document_offset, labels, bands))
+        document_bottom = max(document_bottom, document_offset + curr.height)
+    # Scrolling up reveals content above the first frame; the document starts at row 0
+    top_offset = min(plan.document_offset for plan in plans)
+    for plan in plans:
+        plan.document_offset -= top_offset
+    return plans
+
+def build_montages(crops: List[np.ndarray], fill: int = 255) -> List[Tuple[np.ndarray, List[Tuple[int, int]]]]:
+    """
+    Stacks crops (same width) into canvases separated by blank gaps.
+    Returns (canvas, [(crop_index, canvas_top), ...]) per canvas.
+    """
+    montages = []
+    group: List[int] = []
+    group_height = 0
+    for index, crop in enumerate(crops):
+        added = crop.shape[0] + MONTAGE_GAP
+        if group and group_height + added > MONTAGE_MAX_HEIGHT:
+            montages.append(_stack(crops, group, fill))
+            group, group_height = [], 0
+        group.append(index)
+        group_height += added
+    if group:
+        montages.append(_stack(crops, group, fill))
+    return montages
+
+def _stack(crops: List[np.ndarray], indices: List[int], fill: int) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    width = crops[indices[0]].shape[1]
+    height = sum(crops[i].shape[0] for i in indices) + MONTAGE_GAP * (len(indices) + 1)
+    canvas = np.full((height, width), fill, dtype=np.uint8)
+    placements = []
+    y = MONTAGE_GAP
+    for i in indices:
+        crop_height = crops[i].shape[0]
+        canvas[y:y + crop_height] = crops[i]
+        placements.append((i, y))
+        y += crop_height + MONTAGE_GAP
+    return canvas, placements
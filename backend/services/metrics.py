@@ -0,0 +1,26 @@
+# Simple in-process metrics (counters), exposed via GET /metrics
+
+import threading
+from collections import defaultdict
+from typing import Dict
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+
+def increment(name: str, amount: float = 1) -> None:
+    """Adds `amount` to the named counter (thread-safe; called from worker threads too)."""
+    with _lock:
+        _counters[name] += amount
+
+def get(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0)
+
+def snapshot() -> Dict[str, float]:
+    """Copy of all counters, sorted by name."""
+    with _lock:
+        return dict(sorted(_counters.items()))
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
@@ -1,26 +1,44 @@
 # Placeholder for OCR service logic
 
 import pytesseract
-from PIL import Image
 import io
+import math
 import os
-from supabase import Client
-from fastapi import HTTPException, UploadFile, BackgroundTasks # Added BackgroundTasks
+import asyncio
+from fastapi import HTTPException, UploadFile, BackgroundTasks, Request # Added BackgroundTasks
 from fastapi.concurrency import run_in_threadpool # Import run_in_threadpool
 import cv2 # Import OpenCV
 import numpy as np # Import numpy for array handling
 from pathlib import Path # Import Path
-from typing import Union, List, Dict, Any, Optional # Added List, Dict, Any, Optional
+from typing import Union, List, Dict, Any, Optional, AsyncIterator, Tuple # Added List, Dict, Any, Optional
 import pandas as pd # Import pandas
 from pydantic import BaseModel
 from datetime import datetime, timezone
 import traceback # For better error printing
 import uuid # Added for generating unique filenames
+import csv # For CSV export
+import json # For NDJSON export
+import zlib # Incremental gzip compression for exports
 from ..models.ocr_models import OcrResultUpdateRequest # Import the new model
+from ..storage.base import OcrStorage, RESULT_COLUMNS # Pluggable result/image storage
+from . import tesseract_runner # Direct stdin/stdout Tesseract invocation
+from . import metrics
+from .result_cache import cache as result_cache, word_box_cache, LIST_KEY, detail_key, word_boxes_key
+from . import word_boxes
+from . import frame_sequence
+from . import quality_tiers
+from .quality_tiers import QualityTier
+from .cancellation import OcrCancellation, OcrCancelledError, REASON_DEADLINE, REASON_DISCONNECT
 
 # --- Constants --- #
 MIN_OCR_CONFIDENCE = 35 # Balanced confidence
-OCR_IMAGES_BUCKET = "ocr-images" # Define bucket name
+# Server-side OCR deadline (seconds); stays below gunicorn's 180 s worker timeout.
+# Clients may request a shorter one via the X-OCR-Timeout header.
+OCR_DEADLINE_SECONDS = float(os.environ.get("OCR_DEADLINE_SECONDS", "150"))
+DISCONNECT_POLL_INTERVAL = 0.25 # Seconds between client-disconnect checks
+EXPORT_CHUNK_SIZE = 1000 # Rows fetched per server-side page during export (PostgREST default max-rows)
+EXPORT_COLUMNS = RESULT_COLUMNS
+MAX_SEQUENCE_FRAMES = int(os.environ.get("MAX_SEQUENCE_FRAMES", "30")) # Frames accepted per sequence request
 # PSM defaults will be set based on image_type
 
 # --- Pydantic Models (Data Structures) ---
@@ -35,6 +53,7 @@ class WordData(BaseModel):
     width: int
     height: int
     confidence: float
+    line: Optional[int] = None # Urutan baris teks (0, 1, 2, ...) dalam urutan baca
 
 # Model ini mendefinisikan struktur data untuk respons API secara keseluruhan.
 # Ini juga contoh Enkapsulasi dan Abstraksi: menyembunyikan detail internal
@@ -45,18 +64,39 @@ class OcrResultWithBoxes(BaseModel):
     words: List[WordData]
     full_text: str # Add field for concatenated text
 
+# Satu frame dari sequence screenshot: kata-kata yang terlihat di frame itu
+# (hasil OCR baru maupun yang dibawa dari frame sebelumnya) dalam koordinat frame.
+class FrameWords(BaseModel):
+    frame_index: int
+    file_name: Optional[str] = None
+    scroll_offset: Optional[int] = None # Baris konten bergeser ke atas vs frame sebelumnya (None = tidak tumpang tindih)
+    document_offset: int # Baris dokumen gabungan yang tampil di baris 0 frame ini
+    ocr_regions: List[List[int]] # Rentang baris [top, bottom) yang benar-benar di-OCR
+    words: List[WordData]
+
+# Hasil OCR sequence: transkrip gabungan tanpa duplikasi (koordinat dokumen) + kata per frame.
+class OcrSequenceResult(BaseModel):
+    processed_image_width: int
+    processed_image_height: int
+    document_height: int
+    frames: List[FrameWords]
+    words: List[WordData]
+    full_text: str
+    ocr_pixel_ratio: float # Piksel yang dikirim ke Tesseract / total piksel semua frame
+
 # --- Image Preprocessing Functions ---
 # Konsep OOP: Abstraksi
 # Fungsi-fungsi ini menyembunyikan detail kompleks dari langkah-langkah
 # pemrosesan gambar (grayscale, thresholding, blur) di balik interface fungsi yang sederhana.
 
-def preprocess_general(image_bytes: bytes) -> np.ndarray:
-    """Preprocessing untuk dokumen/poster umum: Grayscale + Otsu Threshold."""
+def preprocess_general(image_bytes: bytes, tier: Optional[QualityTier] = None) -> np.ndarray:
+    """Preprocessing untuk dokumen/poster umum: Grayscale + profil resolusi tier + Otsu Threshold."""
     print("Menerapkan preprocessing umum (Otsu)...")
     try:
         nparr = np.frombuffer(image_bytes, np.uint8)
         img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
         if img is None: raise ValueError("Tidak dapat mendekode gambar.")
+        img = quality_tiers.apply_profile(img, tier)
 
         # Simple Otsu Thresholding - Often good for high-contrast documents/posters
         _, processed_img = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
@@ -69,13 +109,14 @@ def preprocess_general(image_bytes: bytes) -> np.ndarray:
         traceback.print_exc()
         raise HTTPException(status_code=400, detail=f"Preprocessing gambar gagal: {e}")
 
-def preprocess_chat(image_bytes: bytes) -> np.ndarray:
-    """Preprocessing untuk chat/teks rapi: Grayscale, Otsu Threshold."""
+def preprocess_chat(image_bytes: bytes, tier: Optional[QualityTier] = None) -> np.ndarray:
+    """Preprocessing untuk chat/teks rapi: Grayscale, profil resolusi tier, Otsu Threshold."""
     print("Menerapkan preprocessing chat...")
     try:
         nparr = np.frombuffer(image_bytes, np.uint8)
         img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
         if img is None: raise ValueError("Tidak dapat mendekode gambar.")
+        img = quality_tiers.apply_profile(img, tier)
         _, processed_img = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         print("Chat preprocessing finished.")
         return processed_img
@@ -84,19 +125,82 @@ def preprocess_chat(image_bytes: bytes) -> np.ndarray:
         traceback.print_exc()
         raise HTTPException(status_code=400, detail=f"Preprocessing gambar gagal: {e}")
 
+# --- Cached History Reads ---
+# Query riwayat melewati result_cache; save/update/delete di bawah ini
+# menginvalidasi entri yang terdampak segera setelah penulisan.
+
+async def fetch_results(storage: OcrStorage) -> List[Dict[str, Any]]:
+    """Semua hasil OCR, terbaru lebih dulu (read-through cache)."""
+    return await run_in_threadpool(result_cache.get_or_load, LIST_KEY, storage.list_results)
+
+async def fetch_result(storage: OcrStorage, result_id: str) -> Optional[Dict[str, Any]]:
+    """Satu hasil OCR berdasarkan ID, atau None jika tidak ada (read-through cache)."""
+    return await run_in_threadpool(
+        result_cache.get_or_load, detail_key(result_id), lambda: storage.get_result(result_id)
+    )
+
+# --- Word Boxes: Compact Persistence and Region Queries ---
+
+def encode_word_boxes(words: List[WordData], image_width: int, image_height: int) -> bytes:
+    """Packs the word list into the columnar blob saved with the result."""
+    boxes = word_boxes.WordBoxes(
+        texts=[w.text for w in words],
+        left=[w.left for w in words],
+        top=[w.top for w in words],
+        width=[w.width for w in words],
+        height=[w.height for w in words],
+        conf=[w.confidence for w in words],
+        line=[w.line or 0 for w in words],
+        image_width=image_width,
+        image_height=image_height
+    )
+    return word_boxes.encode(boxes)
+
+async def get_word_boxes(storage: OcrStorage, result_id: str) -> Optional[word_boxes.WordBoxes]:
+    """Decoded word boxes of a result (cached until the result is deleted), or None if none were saved."""
+    def load() -> Optional[word_boxes.WordBoxes]:
+        blob = storage.get_word_boxes(result_id)
+        return word_boxes.decode(blob) if blob else None
+    return await run_in_threadpool(word_box_cache.get_or_load, word_boxes_key(result_id), load)
+
+async def query_words(
+    storage: OcrStorage,
+    result_id: str,
+    rect: Optional[tuple] = None,
+    line: Optional[int] = None,
+    contained: bool = False
+) -> Optional[Dict[str, Any]]:
+    """Words of a saved result inside a rectangle (left, top, right, bottom) and/or on one line."""
+    boxes = await get_word_boxes(storage, result_id)
+    if boxes is None:
+        return None
+    if rect is not None:
+        indices = boxes.query_rect(*rect, contained=contained)
+        if line is not None:
+            indices = indices[boxes.line[indices] == line]
+    else:
+        indices = boxes.query_line(line)
+    return {
+        'result_id': result_id,
+        'processed_image_width': boxes.image_width,
+        'processed_image_height': boxes.image_height,
+        'words': boxes.to_dicts(indices)
+    }
+
 # --- Background Task for Database Saving ---
 # Konsep OOP: Abstraksi
 # Fungsi ini menyembunyikan detail interaksi dengan database (query insert)
 # dari logika utama OCR.
 async def save_result_to_db(
-    supabase_client: Client,
+    storage: OcrStorage,
     filename: Optional[str],
     extracted_text: str,
-    image_url: Optional[str] = None # Added image_url parameter
+    image_url: Optional[str] = None, # Added image_url parameter
+    word_boxes: Optional[bytes] = None # Compact blob from encode_word_boxes
 ):
-    """Menyimpan hasil OCR ke database Supabase di background."""
+    """Menyimpan hasil OCR ke storage backend di background."""
     if not extracted_text and not image_url: # Also check image_url
-        print("Background task: Skipping Supabase save - No text extracted and no image URL.")
+        print("Background task: Skipping save - No text extracted and no image URL.")
         return
     try:
         # Use timezone.utc for consistency
@@ -108,110 +212,84 @@ async def save_result_to_db(
         }
         if image_url:
             db_entry['image_url'] = image_url
+        if word_boxes:
+            db_entry['word_boxes'] = word_boxes
             
-        print(f"Background task: Attempting to save result for {filename} at {processed_time} with image_url: {image_url}")
-        # Re-applying fix: execute() is not awaitable for insert in supabase-py v1
-        response = supabase_client.table('ocr_results').insert(db_entry).execute()
-        if hasattr(response, 'data') and response.data:
-            print(f"Background task: Successfully saved result for {filename}. Response data: {response.data}")
-        else:
-            print(f"Background task: Save operation for {filename} completed. Full response: {response}")
+        print(f"Background task: Attempting to save result for {filename} at {processed_time} with image_url: {image_url} "
+              f"(word boxes: {len(word_boxes) if word_boxes else 0} bytes)")
+        saved_row = await run_in_threadpool(storage.insert_result, db_entry)
+        result_cache.invalidate_result() # New row: cached history lists are now stale
+        print(f"Background task: Successfully saved result for {filename}. Row: {saved_row}")
     except Exception as db_error:
-        print(f"Background task: Error saving to Supabase for {filename}: {db_error}")
+        print(f"Background task: Error saving result for {filename}: {db_error}")
         traceback.print_exc() # Log detailed error
 
 # --- Helper Function to Delete Image from Storage ---
 async def delete_image_from_storage(
-    supabase_client: Client,
-    bucket_name: str,
-    image_path: str # This should be the path within the bucket (e.g., UUID.png)
+    storage: OcrStorage,
+    image_url: Optional[str]
 ):
-    """Deletes an image from Supabase Storage."""
-    if not image_path:
-        print("No image path provided, skipping deletion from storage.")
+    """Deletes an image from the storage backend (errors are logged, not raised)."""
+    if not image_url:
+        print("No image URL provided, skipping deletion from storage.")
         return
     try:
-        print(f"Attempting to delete image '{image_path}' from bucket '{bucket_name}'...")
-        # The path used here must be exactly what was used to upload/identify the file in storage.
-        # Supabase storage often uses the filename itself as the path if not in a folder.
-        response = await run_in_threadpool(supabase_client.storage.from_(bucket_name).remove, [image_path])
-        print(f"Supabase storage delete response for '{image_path}': {response}")
-        # Add more robust error checking based on Supabase client's response for delete operations
-        # For example, check if response indicates success or if any items in response have errors
-        # This is a basic check; you might need to inspect the response structure more closely.
-        if response and isinstance(response, list) and response[0].get('error'):
-             print(f"Error reported by Supabase deleting '{image_path}': {response[0]['error']}")
-        elif not response:
-             print(f"Warning: Supabase delete response for '{image_path}' was empty or unexpected.")
-
+        await run_in_threadpool(storage.delete_image, image_url)
     except Exception as storage_error:
-        print(f"Error deleting image '{image_path}' from Supabase Storage: {storage_error}")
+        print(f"Error deleting image '{image_url}' from storage: {storage_error}")
         traceback.print_exc()
         # Do not raise HTTPException here as this is a helper; let calling function decide error handling
 
+async def upload_image_to_storage(
+    storage: OcrStorage,
+    file: UploadFile,
+    image_bytes: bytes
+) -> str:
+    """Uploads image bytes under a unique name and returns the public URL."""
+    # Generate a unique name for the image file in storage
+    file_extension = Path(file.filename).suffix if file.filename else ".png" # Default to .png if no suffix
+    unique_image_name = f"{uuid.uuid4()}{file_extension}"
+    print(f"Uploading {unique_image_name} to storage...")
+    image_url = await run_in_threadpool(
+        storage.upload_image,
+        unique_image_name,
+        image_bytes, # Send bytes directly
+        file.content_type or 'image/png'
+    )
+    print(f"Image uploaded successfully. Public URL: {image_url}")
+    return image_url
+
 # --- Function to Update OCR Result (Text and optionally Image) ---
 async def update_ocr_result(
-    supabase_client: Client,
+    storage: OcrStorage,
     result_id: str,
     update_data: OcrResultUpdateRequest, # Pydantic model for update payload
     new_file: Optional[UploadFile] = None
 ) -> Dict[str, Any]: # Return the updated record or a success message
     """Updates an OCR result in the database, and optionally its image in storage."""
     try:
-        # Re-applying fix: Select all columns initially
         print(f"Fetching current OCR result for ID: {result_id} before update.")
-        current_result_response = await run_in_threadpool(
-            supabase_client.table('ocr_results').select('*').eq('id', result_id).maybe_single().execute
-        )
-        current_result_data = None
-        if hasattr(current_result_response, 'data') and current_result_response.data:
-            current_result_data = current_result_response.data
+        current_result_data = await run_in_threadpool(storage.get_result, result_id)
         if not current_result_data:
             raise HTTPException(status_code=404, detail=f"OCR Result with ID {result_id} not found.")
 
-        old_image_url = current_result_data.get('image_url')
-        new_image_url_for_db: Optional[str] = old_image_url
+        new_image_url_for_db: Optional[str] = None
         
-        # 2. If a new file is provided, upload it and delete the old one
+        # 2. If a new file is provided, upload it (the old one is deleted after the DB update)
         if new_file:
             if not new_file.content_type or not new_file.content_type.startswith("image/"):
                 raise HTTPException(status_code=400, detail="Invalid new file type. Please upload an image.")
 
-            # Delete old image from storage if it exists
-            if old_image_url:
-                # Extract path from URL (this might need to be more robust depending on URL structure)
-                # Assuming URL is like: .../bucket_name/image_file_name.ext
-                old_image_path = old_image_url.split(f"/{OCR_IMAGES_BUCKET}/")[-1]
-                if old_image_path and old_image_path != old_image_url: # Basic check
-                    print(f"Old image URL found: {old_image_url}. Extracted path: {old_image_path}")
-                    await delete_image_from_storage(supabase_client, OCR_IMAGES_BUCKET, old_image_path)
-                else:
-                    print(f"Could not reliably extract path from old image URL: {old_image_url}")
-            
-            # Upload new image
             new_image_bytes = await new_file.read()
             if not new_image_bytes:
                  raise HTTPException(status_code=400, detail="Empty new file uploaded for update.")
 
-            file_extension = Path(new_file.filename).suffix if new_file.filename else ".png"
-            unique_new_image_name = f"{uuid.uuid4()}{file_extension}"
-            
-            print(f"Uploading new image {unique_new_image_name} to bucket {OCR_IMAGES_BUCKET} for update...")
-            await run_in_threadpool(
-                supabase_client.storage.from_(OCR_IMAGES_BUCKET).upload,
-                path=unique_new_image_name,
-                file=new_image_bytes,
-                file_options={'content-type': new_file.content_type or 'image/png'}
-            )
-            public_url_response = supabase_client.storage.from_(OCR_IMAGES_BUCKET).get_public_url(unique_new_image_name)
-            if isinstance(public_url_response, str):
-                new_image_url_for_db = public_url_response
-                print(f"New image uploaded successfully. Public URL: {new_image_url_for_db}")
-            else:
-                print(f"Warning: Could not retrieve public URL for new image: {public_url_response}")
-                # Decide handling: proceed without new URL, or raise error?
-                # For now, if new file was intended, and URL fails, this is an issue.
-                raise HTTPException(status_code=500, detail="Failed to get public URL for new image after upload.")
+            try:
+                new_image_url_for_db = await upload_image_to_storage(storage, new_file, new_image_bytes)
+            except Exception as upload_err:
+                print(f"Error uploading new image for update: {upload_err}")
+                traceback.print_exc()
+                raise HTTPException(status_code=500, detail="Failed to upload new image for update.")
 
         # 3. Prepare data for database update
         update_payload: Dict[str, Any] = {}
@@ -219,12 +297,8 @@ async def update_ocr_result(
             update_payload['extracted_text'] = update_data.extracted_text
         if update_data.file_name is not None:
             update_payload['file_name'] = update_data.file_name
-        if new_file and new_image_url_for_db:
+        if new_image_url_for_db:
              update_payload['image_url'] = new_image_url_for_db
-        elif new_file and not new_image_url_for_db: # New file provided but URL failed
-            # This case should ideally be caught above, but as a safeguard:
-            print("Error: New file provided for update, but its URL could not be obtained.")
-            # Depending on strictness, could raise error or skip image_url update
 
         # Re-applying fix: Return full initial data if no changes
         if not update_payload:
@@ -232,28 +306,35 @@ async def update_ocr_result(
             return current_result_data 
 
         print(f"Updating OCR result ID: {result_id} with payload: {update_payload}")
-        update_response = await run_in_threadpool(
-            supabase_client.table('ocr_results').update(update_payload).eq('id', result_id).execute
-        )
-        
-        # Re-applying fix: Check update response and fetch full record again
-        if hasattr(update_response, 'data') and not update_response.data:
-            print(f"Warning: Update operation for ID {result_id} returned empty data. Assuming ID not found or no change needed.")
-            # Even if update returned empty, try fetching data to be sure
+        # The previous row comes from the update itself, not from the read above: a
+        # concurrent update/delete must not make us release an image twice
+        previous_row = await run_in_threadpool(storage.replace_result, result_id, update_payload)
+        result_cache.invalidate_result(result_id)
+        if previous_row is None:
+            if new_image_url_for_db:
+                await delete_image_from_storage(storage, new_image_url_for_db)
+            raise HTTPException(status_code=404, detail=f"OCR Result with ID {result_id} not found.")
+
+        # The row's reference to its old image is released; the storage removes the
+        # image once nothing references it. Re-uploading identical content yields the
+        # same URL with a second reference, of which the row keeps only one.
+        old_image_url = previous_row.get('image_url')
+        if new_image_url_for_db and old_image_url:
+            print(f"Old image URL found: {old_image_url}. Releasing it in storage.")
+            await delete_image_from_storage(storage, old_image_url)
 
         print(f"Update operation completed for {result_id}. Fetching updated record...")
-        # Fetch the full updated record directly (removed run_in_threadpool here previously, let's keep it off)
         try:
-            fetch_updated_response = supabase_client.table('ocr_results').select('*').eq('id', result_id).maybe_single().execute()
+            updated_record = await run_in_threadpool(storage.get_result, result_id)
         except Exception as fetch_err:
-             print(f"Error directly fetching updated record for ID {result_id}: {fetch_err}")
+             print(f"Error fetching updated record for ID {result_id}: {fetch_err}")
              raise HTTPException(status_code=500, detail=f"Failed to retrieve updated OCR result after potential update for ID {result_id}.")
 
-        if hasattr(fetch_updated_response, 'data') and fetch_updated_response.data:
+        if updated_record:
             print(f"Successfully fetched updated OCR result ID: {result_id}")
-            return fetch_updated_response.data # Return the full, validated record
+            return updated_record # Return the full, validated record
         else:
-            print(f"Error: Failed to fetch the updated record for ID {result_id} after update. Response: {fetch_updated_response}")
+            print(f"Error: Failed to fetch the updated record for ID {result_id} after update.")
             raise HTTPException(status_code=500, detail=f"Failed to retrieve updated OCR result after update for ID {result_id}.")
 
     except HTTPException as e:
@@ -265,59 +346,24 @@ async def update_ocr_result(
 
 # --- Function to Delete Result from DB (Modified) ---
 async def delete_result_from_db(
-    supabase_client: Client,
+    storage: OcrStorage,
     result_id: str
 ):
-    """Menghapus hasil OCR dari database Supabase berdasarkan ID, dan juga gambarnya dari storage."""
+    """Menghapus hasil OCR dari database berdasarkan ID, dan juga gambarnya dari storage."""
     try:
-        # 1. Fetch the record to get image_url before deleting from DB
-        print(f"Fetching OCR result for ID: {result_id} before deletion to get image_url.")
-        record_to_delete_response = await run_in_threadpool(
-            supabase_client.table('ocr_results').select('image_url').eq('id', result_id).maybe_single().execute
-        )
-
-        record_to_delete_data = None
-        if hasattr(record_to_delete_response, 'data') and record_to_delete_response.data:
-            record_to_delete_data = record_to_delete_response.data
-
-        image_url_to_delete = None
-        if record_to_delete_data:
-            image_url_to_delete = record_to_delete_data.get('image_url')
-        else:
-            # If record doesn't exist, we might not need to raise 404 yet, 
-            # as the delete operation on DB will handle it. But good to log.
-            print(f"Warning: OCR Result with ID {result_id} not found when trying to fetch for image deletion.")
-
-        # 2. Delete from Database
         print(f"Attempting to delete result with ID: {result_id} from database.")
-        db_delete_response = await run_in_threadpool(
-            supabase_client.table('ocr_results').delete().eq('id', result_id).execute
-        )
-        
-        print(f"Supabase DB delete response for ID {result_id}: {db_delete_response}")
-
-        # Check if any row was actually deleted
-        deleted_from_db = False
-        if hasattr(db_delete_response, 'data') and db_delete_response.data:
-            print(f"Successfully deleted result ID: {result_id} from database. Response data: {db_delete_response.data}")
-            deleted_from_db = True
-        elif hasattr(db_delete_response, 'data') and not db_delete_response.data:
-             print(f"Warning: No result found in database with ID {result_id} to delete (data attribute empty). Attempting image deletion if URL was found.")
-        else:
-             print(f"Database delete for ID: {result_id} completed. Response structure might differ or operation had no effect. Attempting image deletion if URL was found.")
-        
-        # If the record was not found in the DB initially (record_to_delete_data is None) 
-        # AND the delete operation also found nothing (not deleted_from_db essentially), then it is a 404.
-        if not record_to_delete_data and not (hasattr(db_delete_response, 'data') and db_delete_response.data):
+        deleted_rows = await run_in_threadpool(storage.delete_result, result_id)
+        result_cache.invalidate_result(result_id)
+        word_box_cache.invalidate(word_boxes_key(result_id))
+
+        if not deleted_rows:
             raise HTTPException(status_code=404, detail=f"Result with ID {result_id} not found to delete.")
+        print(f"Successfully deleted result ID: {result_id} from database.")
 
-        # 3. Delete Image from Storage if URL exists
+        # Delete Image from Storage if URL exists
+        image_url_to_delete = deleted_rows[0].get('image_url')
         if image_url_to_delete:
-            image_path_to_delete = image_url_to_delete.split(f"/{OCR_IMAGES_BUCKET}/")[-1]
-            if image_path_to_delete and image_path_to_delete != image_url_to_delete:
-                await delete_image_from_storage(supabase_client, OCR_IMAGES_BUCKET, image_path_to_delete)
-            else:
-                print(f"Could not reliably extract path from image URL for deletion: {image_url_to_delete}")
+            await delete_image_from_storage(storage, image_url_to_delete)
         else:
             print(f"No image_url found for result ID {result_id}, skipping storage deletion.")
 
@@ -328,6 +374,131 @@ async def delete_result_from_db(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error processing deletion for result {result_id}: {e}")
 
+# --- Streaming Export of OCR History ---
+# Ekspor membaca tabel ocr_results per halaman (EXPORT_CHUNK_SIZE baris) dan
+# langsung menulis setiap halaman ke response, jadi memori tetap konstan
+# berapa pun jumlah barisnya.
+
+def to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Aware UTC datetime; naive datetimes are treated as UTC (processed_at is stored in UTC)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _to_utc_iso(value: Optional[datetime]) -> Optional[str]:
+    value = to_utc(value)
+    return value.isoformat() if value is not None else None
+
+def encode_export_page(rows: List[Dict[str, Any]], export_format: str, include_header: bool = False) -> bytes:
+    """Serializes one page of rows as NDJSON lines or CSV records."""
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+        if include_header:
+            writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+    return ''.join(json.dumps(row, default=str, ensure_ascii=False) + '\n' for row in rows).encode('utf-8')
+
+async def stream_results_export(
+    storage: OcrStorage,
+    export_format: str = 'ndjson',
+    processed_from: Optional[datetime] = None,
+    processed_to: Optional[datetime] = None,
+    gzip_output: bool = False,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Streams the OCR history as NDJSON/CSV bytes, optionally gzip-compressed."""
+    compressor = zlib.compressobj(wbits=31) if gzip_output else None # wbits=31 -> gzip container
+    pages = storage.iter_result_pages(_to_utc_iso(processed_from), _to_utc_iso(processed_to), chunk_size)
+    first_page = True
+    rows_exported = 0
+    while True:
+        # Storage backends are synchronous; fetch each page off the event loop
+        rows = await run_in_threadpool(next, pages, None)
+        if rows is None:
+            break
+        chunk = encode_export_page(rows, export_format, include_header=first_page)
+        first_page = False
+        rows_exported += len(rows)
+        if compressor:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if first_page and export_format == 'csv':
+        # Empty result set still gets a CSV header
+        chunk = encode_export_page([], export_format, include_header=True)
+        yield compressor.compress(chunk) if compressor else chunk
+    if compressor:
+        yield compressor.flush()
+    print(f"Export selesai: {rows_exported} baris ({export_format}{', gzip' if gzip_output else ''}).")
+
+# --- Request Deadlines and Disconnect Detection ---
+
+def resolve_ocr_timeout(client_timeout: Optional[float]) -> float:
+    """Client-supplied timeout (seconds) capped by the server default OCR_DEADLINE_SECONDS."""
+    # nan/inf/<=0 are ignored: min() with nan would return nan and disable the deadline
+    if client_timeout is None or not math.isfinite(client_timeout) or client_timeout <= 0:
+        return OCR_DEADLINE_SECONDS
+    return min(client_timeout, OCR_DEADLINE_SECONDS)
+
+async def _watch_for_cancellation(request: Optional[Request], cancellation: OcrCancellation):
+    """Polls the connection while OCR runs and cancels the token on disconnect or deadline."""
+    while not cancellation.is_cancelled():
+        if request is not None and await request.is_disconnected():
+            cancellation.cancel(REASON_DISCONNECT)
+            return
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+# --- Tesseract Invocation ---
+
+def resolve_quality_tier(quality: Optional[str]) -> QualityTier:
+    """Tier untuk nilai 'quality' request (None = OCR_DEFAULT_QUALITY); 400 jika tidak dikenal."""
+    try:
+        return quality_tiers.get_tier(quality)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def run_tesseract(
+    processed_img: np.ndarray,
+    config: str,
+    cancellation: Optional[OcrCancellation] = None
+) -> pd.DataFrame:
+    """Menjalankan Tesseract di thread pool dan menerjemahkan error-nya ke HTTPException."""
+    # Konsep OOP: Abstraksi (Penggunaan Library)
+    # tesseract_runner.image_to_data mengirim buffer NumPy sebagai PBM/PGM mentah
+    # lewat stdin (tanpa konversi PIL, encode PNG, dan file sementara).
+    try:
+        return await run_in_threadpool(
+            tesseract_runner.image_to_data,
+            processed_img,
+            config=config,
+            cancellation=cancellation
+        )
+    except OcrCancelledError:
+        raise
+    except Exception as tess_err: # Tangkap error spesifik dari Tesseract
+        print(f"Error saat menjalankan Tesseract via thread pool: {tess_err}")
+        traceback.print_exc()
+        # Periksa apakah ini TesseractNotFoundError atau FileNotFoundError spesifik
+        if isinstance(tess_err, pytesseract.TesseractNotFoundError):
+            raise HTTPException(status_code=500, detail="Tesseract executable not found.")
+        elif isinstance(tess_err, FileNotFoundError) and '.traineddata' in str(tess_err):
+            tessdata_path_info = os.environ.get('TESSDATA_PREFIX', 'Not Set/Default')
+            error_detail = f"Tesseract language data not found. Ensure it's installed and TESSDATA_PREFIX is correct ({tessdata_path_info})."
+            raise HTTPException(status_code=500, detail=error_detail)
+        else:
+            # Error lain dari Tesseract
+            raise HTTPException(status_code=500, detail=f"Error selama eksekusi Tesseract: {tess_err}")
+
+def filter_ocr_data(ocr_data: pd.DataFrame) -> pd.DataFrame:
+    """Membuang kata dengan confidence rendah dan teks kosong."""
+    ocr_data = ocr_data[ocr_data.conf > MIN_OCR_CONFIDENCE]
+    ocr_data = ocr_data.dropna(subset=['text'])
+    return ocr_data[ocr_data.text.astype(str).str.strip() != '']
+
 # --- Main OCR Service Function (Uses image_type) ---
 # Konsep OOP: Abstraksi
 # Fungsi perform_ocr bertindak sebagai interface utama service layer.
@@ -339,10 +510,23 @@ async def perform_ocr(
     languages: List[str],
     save_to_db_flag: bool,
     background_tasks: BackgroundTasks,
-    supabase_client: Optional[Client] = None,
-    image_type: str = "default" # Add image_type param
+    storage: Optional[OcrStorage] = None,
+    image_type: str = "default", # Add image_type param
+    request: Optional[Request] = None, # Used to detect client disconnects
+    cancellation: Optional[OcrCancellation] = None, # Deadline/disconnect token shared with the Tesseract thread
+    quality: Optional[str] = None # fast | balanced | best (lihat quality_tiers)
 ) -> OcrResultWithBoxes:
-    """Melakukan OCR menggunakan preprocessing dan PSM berdasarkan image_type."""
+    """
+    Melakukan OCR menggunakan preprocessing dan PSM berdasarkan image_type,
+    dengan model, OEM, dan profil resolusi sesuai tier kualitas.
+    Jika deadline terlewati atau klien memutus koneksi, proses Tesseract dihentikan
+    dan upload storage serta penyimpanan DB untuk request ini dilewati.
+    """
+    if cancellation is None:
+        cancellation = OcrCancellation(resolve_ocr_timeout(None))
+    watcher: Optional[asyncio.Task] = None
+    image_url_for_db: Optional[str] = None
+    metrics.increment("ocr_requests_total")
     try:
         start_time = datetime.now()
         image_bytes = await file.read()
@@ -350,54 +534,11 @@ async def perform_ocr(
         
         if not image_bytes:
             raise HTTPException(status_code=400, detail="Empty file uploaded.")
+        tier = resolve_quality_tier(quality)
+        metrics.increment(f"ocr_requests_quality_{tier.name}")
 
-        image_url_for_db: Optional[str] = None
-
-        if save_to_db_flag and supabase_client:
-            # Generate a unique name for the image file in storage
-            file_extension = Path(file.filename).suffix if file.filename else ".png" # Default to .png if no suffix
-            unique_image_name = f"{uuid.uuid4()}{file_extension}"
-            
-            try:
-                print(f"Uploading {unique_image_name} to Supabase bucket {OCR_IMAGES_BUCKET}...")
-                # Ensure file pointer is at the beginning for upload
-                await file.seek(0)
-                response = await run_in_threadpool(
-                    supabase_client.storage.from_(OCR_IMAGES_BUCKET).upload,
-                    path=unique_image_name,
-                    file=image_bytes, # Send bytes directly
-                    file_options={'content-type': file.content_type or 'image/png'}
-                )
-                print(f"Supabase upload response: {response}")
-
-                # Check for upload errors (Supabase client specific)
-                # The actual response format might vary. This is a common pattern.
-                # if response.get("error"): # Older versions might use this
-                #     raise Exception(f"Supabase storage error: {response['error']}")
-                # For supabase-py v2, a successful upload typically doesn't throw an error,
-                # but an error response (e.g., status code >= 400) would raise an APIError.
-                # We will get the public URL after successful upload.
-
-                # Get public URL
-                # The path in get_public_url should match the 'path' used in upload
-                public_url_response = supabase_client.storage.from_(OCR_IMAGES_BUCKET).get_public_url(unique_image_name)
-                
-                # supabase-py v2 returns the URL directly
-                if isinstance(public_url_response, str):
-                    image_url_for_db = public_url_response
-                    print(f"Image uploaded successfully. Public URL: {image_url_for_db}")
-                else:
-                    # Handle unexpected response format for public URL
-                    print(f"Warning: Could not retrieve public URL or unexpected format: {public_url_response}")
-                    # image_url_for_db remains None or handle as an error
-
-            except Exception as storage_error:
-                print(f"Error uploading image to Supabase Storage: {storage_error}")
-                traceback.print_exc()
-                # Decide if this should be a fatal error or just a warning
-                # For now, let's make it non-fatal for OCR processing to continue, but log it.
-                # If image storage is critical, you might raise an HTTPException here.
-                image_url_for_db = None # Ensure it's None if upload fails
+        # Mulai memantau deadline dan koneksi klien selama pemrosesan
+        watcher = asyncio.create_task(_watch_for_cancellation(request, cancellation))
 
         # --- Memilih Preprocessing dan PSM berdasarkan image_type ---
         selected_psm: int
@@ -410,58 +551,36 @@ async def perform_ocr(
         # preprocessing berubah tergantung 'tipe' input.
         if image_type == 'chat':
             print(f"Tipe gambar terdeteksi: {image_type}")
-            processed_img = preprocess_chat(image_bytes)
-            selected_psm = 11 # Sparse text
+            processed_img = preprocess_chat(image_bytes, tier)
         else: # Kasus default (dokumen, poster, dll.)
              print(f"Tipe gambar terdeteksi: {image_type} (menggunakan default/umum)")
-             processed_img = preprocess_general(image_bytes)
-             selected_psm = 3 # Gunakan PSM 3 (Auto Page Segmentation) untuk default
+             processed_img = preprocess_general(image_bytes, tier)
+        # PSM per tier: chat -> 11 (sparse text); default -> 3 (auto page segmentation), 6 untuk tier fast
+        selected_psm = tier.psm_for(image_type)
         # --------------------------------------------------------
 
-        print(f"Memulai proses OCR untuk {file.filename} pada {start_time} menggunakan PSM={selected_psm}")
+        print(f"Memulai proses OCR untuk {file.filename} pada {start_time} menggunakan PSM={selected_psm}, kualitas={tier.name}")
 
         processed_height, processed_width = processed_img.shape[:2]
-        pil_img = Image.fromarray(processed_img)
 
         # Bangun konfigurasi Tesseract
-        lang_str = "+".join(languages)
-        custom_config = f'-l {lang_str} --psm {selected_psm}'
+        custom_config = quality_tiers.build_config(tier, languages, image_type)
         print(f"Menjalankan Tesseract dengan config: {custom_config}")
 
         # Lakukan OCR dalam thread pool untuk memastikan tidak memblokir event loop
-        # Konsep OOP: Abstraksi (Penggunaan Library)
-        # Memanggil pytesseract.image_to_data menyembunyikan detail implementasi Tesseract.
-        try:
-            ocr_data: pd.DataFrame = await run_in_threadpool(
-                pytesseract.image_to_data,
-                pil_img,
-                config=custom_config,
-                output_type=pytesseract.Output.DATAFRAME
-            )
-        except Exception as tess_err: # Tangkap error spesifik dari Tesseract
-            print(f"Error saat menjalankan Tesseract via thread pool: {tess_err}")
-            traceback.print_exc()
-            # Periksa apakah ini TesseractNotFoundError atau FileNotFoundError spesifik
-            if isinstance(tess_err, pytesseract.TesseractNotFoundError):
-                raise HTTPException(status_code=500, detail="Tesseract executable not found.")
-            elif isinstance(tess_err, FileNotFoundError) and '.traineddata' in str(tess_err):
-                tessdata_path_info = os.environ.get('TESSDATA_PREFIX', 'Not Set/Default')
-                error_detail = f"Tesseract language data not found. Ensure it's installed and TESSDATA_PREFIX is correct ({tessdata_path_info})."
-                raise HTTPException(status_code=500, detail=error_detail)
-            else:
-                # Error lain dari Tesseract
-                raise HTTPException(status_code=500, detail=f"Error selama eksekusi Tesseract: {tess_err}")
+        ocr_data = await run_tesseract(processed_img, custom_config, cancellation)
 
         # Proses hasil OCR
-        ocr_data = ocr_data[ocr_data.conf > MIN_OCR_CONFIDENCE]
-        ocr_data = ocr_data.dropna(subset=['text'])
-        ocr_data = ocr_data[ocr_data.text.astype(str).str.strip() != '']
+        ocr_data = filter_ocr_data(ocr_data)
         print(f"Pemrosesan mentah OCR selesai. Ditemukan {len(ocr_data)} kata di atas {MIN_OCR_CONFIDENCE}% confidence.")
 
         word_list: List[WordData] = []
         full_text_list = []
+        line_numbers: Dict[tuple, int] = {} # (block, par, line) Tesseract -> nomor baris berurutan
         for index, row in ocr_data.iterrows():
             try:
+                line_key = (row.get('block_num', 0), row.get('par_num', 0), row.get('line_num', 0))
+                line_number = line_numbers.setdefault(line_key, len(line_numbers))
                 # Konsep OOP: Enkapsulasi (Pembuatan Objek WordData)
                 # Membuat instance dari model WordData.
                 word_list.append(
@@ -471,7 +590,8 @@ async def perform_ocr(
                         top=int(row['top']),
                         width=int(row['width']),
                         height=int(row['height']),
-                        confidence=float(row['conf'])
+                        confidence=float(row['conf']),
+                        line=line_number
                     )
                 )
                 full_text_list.append(str(row['text']))
@@ -482,29 +602,49 @@ async def perform_ocr(
         extracted_text = " ".join(full_text_list).strip()
         print(f"Panjang teks akhir yang diekstrak: {len(extracted_text)}")
 
+        # Upload gambar dilakukan setelah OCR berhasil, sehingga request yang
+        # dibatalkan/kedaluwarsa tidak pernah mengunggah apa pun.
+        cancellation.raise_if_cancelled()
+
+        if save_to_db_flag and storage:
+            try:
+                image_url_for_db = await upload_image_to_storage(storage, file, image_bytes)
+            except Exception as storage_error:
+                print(f"Error uploading image to storage: {storage_error}")
+                traceback.print_exc()
+                # Decide if this should be a fatal error or just a warning
+                # For now, let's make it non-fatal for OCR processing to continue, but log it.
+                # If image storage is critical, you might raise an HTTPException here.
+                image_url_for_db = None # Ensure it's None if upload fails
+
+        # Klien mungkin memutus koneksi selama upload; jangan simpan hasil yang tidak ditunggu
+        cancellation.raise_if_cancelled()
+
         # Tambahkan penyimpanan database ke background task jika diminta
-        if save_to_db_flag and supabase_client:
+        if save_to_db_flag and storage:
             # Konsep OOP: Polymorphism (Background Task)
             # Menggunakan BackgroundTasks untuk menjalankan save_result_to_db secara
             # asinkron adalah bentuk abstraksi yang memungkinkan tugas utama (respons API)
             # tidak diblokir oleh operasi I/O database.
             background_tasks.add_task(
                 save_result_to_db, 
-                supabase_client, 
+                storage, 
                 file.filename, 
                 extracted_text,
-                image_url_for_db # Pass the image URL
+                image_url_for_db, # Pass the image URL
+                encode_word_boxes(word_list, processed_width, processed_height) # Kotak kata (blob kolumnar)
             )
             print(f"Background task untuk menyimpan hasil ditambahkan untuk {file.filename} dengan image URL: {image_url_for_db}")
         elif not save_to_db_flag:
-             print("Melewati penyimpanan Supabase: Pilihan pengguna.")
+             print("Melewati penyimpanan: Pilihan pengguna.")
         else:
-             print("Melewati penyimpanan Supabase: Klien DB tidak tersedia.")
+             print("Melewati penyimpanan: Storage backend tidak tersedia.")
 
         end_time = datetime.now()
         duration = end_time - start_time
         print(f"Selesai proses OCR untuk {file.filename} pada {end_time} (Durasi: {duration})")
 
+        metrics.increment("ocr_requests_completed")
         # Konsep OOP: Enkapsulasi (Pembuatan Objek Respon)
         # Mengembalikan hasil dalam struktur OcrResultWithBoxes.
         return OcrResultWithBoxes(
@@ -515,6 +655,23 @@ async def perform_ocr(
         )
 
     # --- Exception Handling ---
+    except OcrCancelledError as e:
+        metrics.increment(f"ocr_cancelled_{e.reason}")
+        if save_to_db_flag and storage:
+            metrics.increment("ocr_db_saves_skipped")
+            if image_url_for_db:
+                # Gambar sudah terunggah sebelum pembatalan terdeteksi; hapus agar tidak yatim
+                await delete_image_from_storage(storage, image_url_for_db)
+            else:
+                metrics.increment("ocr_storage_uploads_skipped")
+        print(f"OCR untuk {file.filename} dibatalkan: {e.reason}")
+        if e.reason == REASON_DEADLINE:
+            raise HTTPException(status_code=504, detail="Batas waktu pemrosesan OCR terlampaui.")
+        raise HTTPException(status_code=499, detail="Klien menutup koneksi sebelum OCR selesai.")
+    except asyncio.CancelledError:
+        # Task request dibatalkan oleh server: pastikan thread Tesseract ikut berhenti
+        cancellation.cancel(REASON_DISCONNECT)
+        raise
     except pytesseract.TesseractNotFoundError as e:
          # Ini seharusnya tidak tercapai lagi, tapi biarkan sebagai fallback
          print(f"Tesseract Error (fallback handler): {e}")
@@ -533,3 +690,289 @@ async def perform_ocr(
         print(f"Terjadi error tak terduga saat OCR untuk file {file.filename if file else 'N/A'}: {e}")
         traceback.print_exc() # Print full traceback for debugging
         raise HTTPException(status_code=500, detail=f"Terjadi error tak terduga saat pemrosesan OCR: {e}")
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+# --- OCR for Screenshot Sequences (Frame Differencing) ---
+# Untuk burst screenshot dari percakapan yang sama: offset scroll dan area yang
+# berubah dideteksi per frame (frame_sequence), lalu hanya area baru/berubah dari
+# semua frame yang disusun ke satu montage dan di-OCR. Kata dari area yang hanya
+# bergeser dibawa dari frame sebelumnya, jadi waktu Tesseract mengikuti jumlah
+# konten baru, bukan jumlah frame.
+
+class _SequenceWord:
+    """Word read while OCR-ing a sequence (frame or document coordinates)."""
+    __slots__ = ("text", "left", "top", "width", "height", "confidence", "line_uid")
+
+    def __init__(self, text: str, left: int, top: int, width: int, height: int, confidence: float, line_uid: tuple):
+        self.text = text
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+        self.line_uid = line_uid # Words with the same uid were on one Tesseract line
+
+    def moved_to(self, top: int) -> "_SequenceWord":
+        return _SequenceWord(self.text, self.left, top, self.width, self.height, self.confidence, self.line_uid)
+
+    @property
+    def center_y(self) -> int:
+        return self.top + self.height // 2
+
+def _rows_have_label(labels: np.ndarray, top: int, height: int, label: int) -> bool:
+    return top >= 0 and top + height <= len(labels) and bool(np.all(labels[top:top + height] == label))
+
+def _to_word_data(words: List[_SequenceWord]) -> List[WordData]:
+    """Reading order (line by line, left to right) with sequential line numbers."""
+    lines: Dict[tuple, List[_SequenceWord]] = {}
+    for word in words:
+        lines.setdefault(word.line_uid, []).append(word)
+    ordered = sorted(lines.values(), key=lambda line: (min(w.top for w in line), min(w.left for w in line)))
+    return [
+        WordData(text=w.text, left=w.left, top=w.top, width=w.width, height=w.height,
+                 confidence=w.confidence, line=line_number)
+        for line_number, line in enumerate(ordered)
+        for w in sorted(line, key=lambda w: w.left)
+    ]
+
+async def _ocr_sequence_bands(
+    frames: List[np.ndarray],
+    plans: List[frame_sequence.FramePlan],
+    config: str,
+    cancellation: OcrCancellation
+) -> Tuple[Dict[int, List[_SequenceWord]], int]:
+    """OCRs every changed band of every frame via montages; returns words per frame and pixels OCR'd."""
+    crops: List[np.ndarray] = []
+    owners: List[Tuple[int, int]] = [] # (frame index, band top) per crop
+    for plan in plans:
+        for top, bottom in plan.bands:
+            crops.append(frames[plan.index][top:bottom])
+            owners.append((plan.index, top))
+
+    new_words: Dict[int, List[_SequenceWord]] = {plan.index: [] for plan in plans}
+    if not crops:
+        return new_words, 0
+    fill = 255 if frames[0].mean() >= 128 else 0 # Montage background follows the (light/dark) theme
+    ocr_pixels = 0
+    for montage_index, (canvas, placements) in enumerate(frame_sequence.build_montages(crops, fill)):
+        cancellation.raise_if_cancelled()
+        ocr_pixels += canvas.size
+        ocr_data = filter_ocr_data(await run_tesseract(canvas, config, cancellation))
+        starts = [canvas_top for _, canvas_top in placements]
+        for _, row in ocr_data.iterrows():
+            try:
+                top, height = int(row['top']), int(row['height'])
+                slot = int(np.searchsorted(starts, top + height // 2, side='right')) - 1
+                if slot < 0:
+                    continue
+                crop_index, canvas_top = placements[slot]
+                if top + height // 2 >= canvas_top + crops[crop_index].shape[0]:
+                    continue # Noise in the gap between bands
+                frame_index, band_top = owners[crop_index]
+                new_words[frame_index].append(_SequenceWord(
+                    text=str(row['text']),
+                    left=int(row['left']),
+                    top=top - canvas_top + band_top,
+                    width=int(row['width']),
+                    height=height,
+                    confidence=float(row['conf']),
+                    line_uid=(montage_index, crop_index, row.get('block_num', 0), row.get('par_num', 0), row.get('line_num', 0))
+                ))
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"Peringatan: Melewati baris karena error data: {row} - Error: {e}")
+    return new_words, ocr_pixels
+
+def _carry_frame_words(
+    plans: List[frame_sequence.FramePlan],
+    new_words: Dict[int, List[_SequenceWord]]
+) -> List[List[_SequenceWord]]:
+    """
+    Words visible in each frame: previous words on scrolled/static rows plus the frame's new words.
+    A word that is only partly visible now (e.g. sliding under a fixed footer) is dropped from that frame.
+    """
+    frame_words: List[List[_SequenceWord]] = []
+    for plan in plans:
+        words: List[_SequenceWord] = []
+        if frame_words and not plan.is_cut:
+            for word in frame_words[-1]:
+                moved_top = word.top - plan.scroll_offset
+                if _rows_have_label(plan.labels, moved_top, word.height, frame_sequence.ROW_SCROLLED):
+                    words.append(word.moved_to(moved_top))
+                elif plan.scroll_offset != 0 and _rows_have_label(plan.labels, word.top, word.height, frame_sequence.ROW_STATIC):
+                    words.append(word)
+        words.extend(new_words[plan.index])
+        frame_words.append(words)
+    return frame_words
+
+def _build_transcript(
+    plans: List[frame_sequence.FramePlan],
+    new_words: Dict[int, List[_SequenceWord]],
+    frame_height: int
+) -> List[_SequenceWord]:
+    """
+    De-duplicated words in stitched-document coordinates. Every area is OCR'd once;
+    when a band is re-read (changed content) its words replace the older ones there.
+    Rows that stay fixed while the rest scrolls (app header/footer) are pinned to the
+    top of the document or to the bottom of the lowest frame.
+    """
+    static_rows = np.zeros(frame_height, dtype=bool)
+    for plan in plans:
+        static_rows |= plan.labels == frame_sequence.ROW_STATIC
+    bottom_offset = max(plan.document_offset for plan in plans)
+
+    def pinned_base(frame_y: int) -> Optional[int]:
+        """Document row of frame row 0 for header/footer rows, None for scrolling content."""
+        if not static_rows[min(max(frame_y, 0), frame_height - 1)]:
+            return None
+        return 0 if frame_y < frame_height // 2 else bottom_offset
+
+    entries: List[Tuple[Optional[int], _SequenceWord]] = [] # (pinned base or None, word in document coordinates)
+    for plan in plans:
+        for top, bottom in plan.bands:
+            entries = [
+                (pinned, word) for pinned, word in entries
+                if not (
+                    top + plan.document_offset <= word.center_y < bottom + plan.document_offset
+                    if pinned is None else
+                    top <= word.center_y - pinned < bottom
+                )
+            ]
+        for word in new_words[plan.index]:
+            pinned = pinned_base(word.center_y)
+            base = plan.document_offset if pinned is None else pinned
+            entries.append((pinned, word.moved_to(word.top + base)))
+    return [word for _, word in entries]
+
+def _preprocess_frames(
+    frame_bytes: List[bytes],
+    image_type: str,
+    tier: QualityTier,
+    cancellation: OcrCancellation
+) -> List[np.ndarray]:
+    """Decodes and preprocesses every frame (worker thread), stopping between frames once cancelled."""
+    preprocess = preprocess_chat if image_type == 'chat' else preprocess_general
+    frames = []
+    for image_bytes in frame_bytes:
+        cancellation.raise_if_cancelled()
+        frames.append(preprocess(image_bytes, tier))
+    return frames
+
+async def perform_sequence_ocr(
+    files: List[UploadFile],
+    languages: List[str],
+    save_to_db_flag: bool,
+    background_tasks: BackgroundTasks,
+    storage: Optional[OcrStorage] = None,
+    image_type: str = "chat",
+    request: Optional[Request] = None,
+    cancellation: Optional[OcrCancellation] = None,
+    quality: Optional[str] = None
+) -> OcrSequenceResult:
+    """
+    OCR untuk urutan screenshot dari percakapan yang sama yang sedang di-scroll.
+    Hanya area yang baru muncul atau berubah yang di-OCR; hasilnya satu transkrip
+    tanpa duplikasi plus kotak kata per frame. Jika disimpan, hasil tersimpan
+    sebagai satu entri (transkrip + kotak kata dalam koordinat dokumen) tanpa gambar.
+    """
+    if cancellation is None:
+        cancellation = OcrCancellation(resolve_ocr_timeout(None))
+    watcher: Optional[asyncio.Task] = None
+    metrics.increment("ocr_sequence_requests_total")
+    try:
+        start_time = datetime.now()
+        if not files:
+            raise HTTPException(status_code=400, detail="Tidak ada frame yang diunggah.")
+        if len(files) > MAX_SEQUENCE_FRAMES:
+            raise HTTPException(status_code=400, detail=f"Maksimal {MAX_SEQUENCE_FRAMES} frame per sequence.")
+
+        tier = resolve_quality_tier(quality)
+        metrics.increment(f"ocr_requests_quality_{tier.name}")
+        # Deadline and disconnect detection cover decoding too (up to MAX_SEQUENCE_FRAMES frames)
+        watcher = asyncio.create_task(_watch_for_cancellation(request, cancellation))
+
+        frame_bytes: List[bytes] = []
+        for file in files:
+            image_bytes = await file.read()
+            if not image_bytes:
+                raise HTTPException(status_code=400, detail=f"File kosong: {file.filename}")
+            frame_bytes.append(image_bytes)
+        frames = await run_in_threadpool(_preprocess_frames, frame_bytes, image_type, tier, cancellation)
+        frame_height, frame_width = frames[0].shape[:2]
+        if any(frame.shape[:2] != (frame_height, frame_width) for frame in frames):
+            raise HTTPException(status_code=400, detail="Semua frame dalam satu sequence harus berukuran sama.")
+
+        plans = await run_in_threadpool(frame_sequence.plan_sequence, frames)
+        custom_config = quality_tiers.build_config(tier, languages, image_type)
+        print(f"Sequence {len(frames)} frame: offset scroll {[plan.scroll_offset for plan in plans[1:]]}, "
+              f"{sum(len(plan.bands) for plan in plans)} area baru, config: {custom_config}")
+        new_words, ocr_pixels = await _ocr_sequence_bands(frames, plans, custom_config, cancellation)
+
+        frame_words = _carry_frame_words(plans, new_words)
+        transcript_words = _to_word_data(_build_transcript(plans, new_words, frame_height))
+        document_height = max(plan.document_offset for plan in plans) + frame_height
+
+        lines: Dict[int, List[str]] = {}
+        for word in transcript_words:
+            lines.setdefault(word.line, []).append(word.text)
+        full_text = "\n".join(" ".join(line) for line in lines.values())
+
+        total_pixels = sum(frame.size for frame in frames)
+        metrics.increment("ocr_sequence_frames", len(frames))
+        metrics.increment("ocr_sequence_pixels_total", total_pixels)
+        metrics.increment("ocr_sequence_pixels_ocr", ocr_pixels)
+
+        cancellation.raise_if_cancelled()
+        if save_to_db_flag and storage:
+            sequence_name = f"{files[0].filename} (+{len(files) - 1} frame)" if len(files) > 1 else files[0].filename
+            background_tasks.add_task(
+                save_result_to_db,
+                storage,
+                sequence_name,
+                full_text,
+                None,
+                encode_word_boxes(transcript_words, frame_width, document_height)
+            )
+
+        print(f"Selesai OCR sequence {len(frames)} frame (Durasi: {datetime.now() - start_time}, "
+              f"piksel di-OCR: {ocr_pixels}/{total_pixels})")
+        metrics.increment("ocr_sequence_requests_completed")
+        return OcrSequenceResult(
+            processed_image_width=frame_width,
+            processed_image_height=frame_height,
+            document_height=document_height,
+            frames=[
+                FrameWords(
+                    frame_index=plan.index,
+                    file_name=files[plan.index].filename,
+                    scroll_offset=plan.scroll_offset,
+                    document_offset=plan.document_offset,
+                    ocr_regions=[[top, bottom] for top, bottom in plan.bands],
+                    words=_to_word_data(words)
+                )
+                for plan, words in zip(plans, frame_words)
+            ],
+            words=transcript_words,
+            full_text=full_text,
+            ocr_pixel_ratio=round(ocr_pixels / total_pixels, 4) if total_pixels else 0.0
+        )
+
+    except OcrCancelledError as e:
+        metrics.increment(f"ocr_cancelled_{e.reason}")
+        print(f"OCR sequence dibatalkan: {e.reason}")
+        if e.reason == REASON_DEADLINE:
+            raise HTTPException(status_code=504, detail="Batas waktu pemrosesan OCR terlampaui.")
+        raise HTTPException(status_code=499, detail="Klien menutup koneksi sebelum OCR selesai.")
+    except asyncio.CancelledError:
+        cancellation.cancel(REASON_DISCONNECT)
+        raise
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        print(f"Terjadi error tak terduga saat OCR sequence: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Terjadi error tak terduga saat pemrosesan OCR sequence: {e}")
+    finally:
+        if watcher is not None:
+            watcher.cancel()
@@ -0,0 +1,178 @@
+# Speed/quality tiers for OCR requests
+#
+# Setiap tier (fast | balanced | best) menentukan model Tesseract yang dipakai
+# (folder tessdata "fast" atau "best", dimuat berdampingan lewat --tessdata-dir),
+# engine mode (OEM), PSM per tipe gambar, serta profil resolusi/preprocessing.
+# Default di bawah dapat ditimpa per field lewat file JSON (OCR_QUALITY_TIERS_FILE), contoh:
+#   {"fast": {"max_side": 1200, "psm": {"chat": 6}}, "best": {"oem": 1, "upscale_below": 2400}}
+# "psm" digabung per tipe gambar; tier/field yang tidak dikenal, nilai bertipe salah,
+# dan OCR_DEFAULT_QUALITY yang tidak valid ditolak saat startup (bukan per request).
+
+import json
+import os
+import shlex
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+import cv2
+import numpy as np
+from . import metrics
+
+QUALITY_TIER_NAMES = ("fast", "balanced", "best")
+TIER_FIELDS = ("model", "oem", "psm", "max_side", "upscale_below", "denoise")
+DEFAULT_QUALITY = os.environ.get("OCR_DEFAULT_QUALITY", "balanced")
+OCR_QUALITY_TIERS_FILE = os.environ.get("OCR_QUALITY_TIERS_FILE")
+
+class QualityTier:
+    """Model variant, engine mode, PSM and preprocessing profile of one tier."""
+    def __init__(
+        self,
+        name: str,
+        model: Optional[str] = None, # tessdata variant: "fast", "best" or None (TESSDATA_PREFIX as is)
+        oem: Optional[int] = None, # None = Tesseract default
+        psm: Optional[Dict[str, int]] = None, # image_type -> PSM ("default" used for unknown types)
+        max_side: Optional[int] = None, # Downscale so the longest side is at most this
+        upscale_below: Optional[int] = None, # Upscale (x2) when the longest side is below this
+        denoise: bool = False # Median blur before thresholding
+    ):
+        self.name = name
+        self.model = model
+        self.oem = oem
+        self.psm = psm or {"default": 3, "chat": 11}
+        self.max_side = max_side
+        self.upscale_below = upscale_below
+        self.denoise = denoise
+
+    def psm_for(self, image_type: str) -> int:
+        return self.psm.get(image_type, self.psm["default"])
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, key) for key in TIER_FIELDS}
+
+DEFAULT_TIERS: Dict[str, QualityTier] = {
+    # Interaktif: model fast (LSTM integer), resolusi dibatasi, satu blok teks untuk dokumen
+    "fast": QualityTier("fast", model="fast", oem=1, psm={"default": 6, "chat": 11}, max_side=1600),
+    # Perilaku sebelumnya: model di TESSDATA_PREFIX, resolusi asli
+    "balanced": QualityTier("balanced"),
+    # Arsip: model best (LSTM float), gambar kecil diperbesar, derau dihaluskan
+    "best": QualityTier("best", model="best", oem=1, psm={"default": 3, "chat": 11},
+                        upscale_below=2000, denoise=True),
+}
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def validate_tier(tier: QualityTier, source: str) -> None:
+    """Raises ValueError for field values Tesseract or the preprocessing profile can't use."""
+    problems = []
+    if tier.model is not None and not (isinstance(tier.model, str) and tier.model.isidentifier()):
+        problems.append(f"model must be null or a tessdata variant name, got {tier.model!r}")
+    if tier.oem is not None and not (_is_int(tier.oem) and 0 <= tier.oem <= 3):
+        problems.append(f"oem must be null or an integer 0-3, got {tier.oem!r}")
+    if not isinstance(tier.psm, dict) or 'default' not in tier.psm:
+        problems.append(f"psm must map image types to PSM numbers including 'default', got {tier.psm!r}")
+    else:
+        for image_type, psm in tier.psm.items():
+            if not (_is_int(psm) and 0 <= psm <= 13):
+                problems.append(f"psm[{image_type!r}] must be an integer 0-13, got {psm!r}")
+    for field in ('max_side', 'upscale_below'):
+        value = getattr(tier, field)
+        if value is not None and not (_is_int(value) and value > 0):
+            problems.append(f"{field} must be null or a positive integer, got {value!r}")
+    if not isinstance(tier.denoise, bool):
+        problems.append(f"denoise must be true or false, got {tier.denoise!r}")
+    if problems:
+        raise ValueError(f"Invalid quality tier {tier.name!r} in {source}: {'; '.join(problems)}")
+
+def load_tiers(path: Optional[str] = OCR_QUALITY_TIERS_FILE) -> Dict[str, QualityTier]:
+    """Default tiers with per-field overrides from the JSON file at `path` (if any)."""
+    tiers = {name: QualityTier(name, **tier.to_dict()) for name, tier in DEFAULT_TIERS.items()}
+    if not path:
+        return tiers
+    with open(path, encoding="utf-8") as f:
+        overrides = json.load(f)
+    for name, fields in overrides.items():
+        if name not in tiers:
+            raise ValueError(f"Unknown quality tier in {path}: {name!r} (choose from {', '.join(QUALITY_TIER_NAMES)})")
+        if not isinstance(fields, dict):
+            raise ValueError(f"Overrides for quality tier {name!r} in {path} must be an object, got {fields!r}")
+        unknown = sorted(set(fields) - set(TIER_FIELDS))
+        if unknown:
+            raise ValueError(f"Unknown field(s) for quality tier {name!r} in {path}: {', '.join(unknown)} "
+                             f"(choose from {', '.join(TIER_FIELDS)})")
+        merged = {**tiers[name].to_dict(), **fields}
+        if 'psm' in fields:
+            if not isinstance(fields['psm'], dict):
+                raise ValueError(f"'psm' for quality tier {name!r} in {path} must map image types to PSM numbers")
+            # Per image type: {"chat": 6} keeps the tier's "default" (and any other type)
+            merged['psm'] = {**tiers[name].psm, **fields['psm']}
+        tiers[name] = QualityTier(name, **merged)
+        validate_tier(tiers[name], path)
+    print(f"Quality tiers loaded from {path}: {', '.join(overrides)}")
+    return tiers
+
+TIERS = load_tiers()
+if DEFAULT_QUALITY.strip().lower() not in TIERS:
+    raise ValueError(f"Invalid OCR_DEFAULT_QUALITY {DEFAULT_QUALITY!r}; choose from {', '.join(QUALITY_TIER_NAMES)}")
+
+def get_tier(quality: Optional[str]) -> QualityTier:
+    """Tier for a request's `quality` value; raises ValueError for unknown names."""
+    name = (quality or DEFAULT_QUALITY).strip().lower()
+    if name not in TIERS:
+        raise ValueError(f"Unknown quality {quality!r}; choose from {', '.join(QUALITY_TIER_NAMES)}")
+    return TIERS[name]
+
+# --- Model Variants --- #
+
+def model_dir(model: str) -> Path:
+    """TESSDATA_FAST_DIR / TESSDATA_BEST_DIR, defaulting to <TESSDATA_PREFIX>/fast and /best."""
+    configured = os.environ.get(f"TESSDATA_{model.upper()}_DIR")
+    if configured:
+        return Path(configured)
+    return Path(os.environ.get("TESSDATA_PREFIX", "tessdata")) / model
+
+@lru_cache(maxsize=64)
+def _resolve_tessdata_dir(model: Optional[str], languages: tuple, tessdata_prefix: Optional[str]) -> Optional[str]:
+    if model is None:
+        return None
+    directory = model_dir(model)
+    missing = [lang for lang in languages if not (directory / f"{lang}.traineddata").is_file()]
+    if missing:
+        # Side-by-side variant not installed for these languages: use the default models
+        print(f"Peringatan: model '{model}' untuk {', '.join(missing)} tidak ada di {directory}; memakai TESSDATA_PREFIX.")
+        return None
+    return str(directory)
+
+def tessdata_dir_for(tier: QualityTier, languages: List[str]) -> Optional[str]:
+    """--tessdata-dir for the tier's model variant, or None to use TESSDATA_PREFIX."""
+    tessdata_dir = _resolve_tessdata_dir(tier.model, tuple(languages), os.environ.get("TESSDATA_PREFIX"))
+    if tier.model is not None and tessdata_dir is None:
+        # The warning above is logged once per process; the counter shows how often it matters
+        metrics.increment(f"ocr_quality_model_fallback_{tier.name}")
+    return tessdata_dir
+
+def build_config(tier: QualityTier, languages: List[str], image_type: str) -> str:
+    """Tesseract command-line options for one request."""
+    parts = [f"-l {'+'.join(languages)}", f"--psm {tier.psm_for(image_type)}"]
+    if tier.oem is not None:
+        parts.append(f"--oem {tier.oem}")
+    tessdata_dir = tessdata_dir_for(tier, languages)
+    if tessdata_dir:
+        parts.append(f"--tessdata-dir {shlex.quote(tessdata_dir)}")
+    return " ".join(parts)
+
+# --- Resolution / Preprocessing Profile --- #
+
+def apply_profile(img: np.ndarray, tier: Optional[QualityTier]) -> np.ndarray:
+    """Rescales and denoises a grayscale image according to the tier (before thresholding)."""
+    if tier is None:
+        return img
+    longest = max(img.shape[:2])
+    if tier.max_side and longest > tier.max_side:
+        scale = tier.max_side / longest
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    elif tier.upscale_below and longest < tier.upscale_below:
+        img = cv2.resize(img, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
+    if tier.denoise:
+        img = cv2.medianBlur(img, 3)
+    return img
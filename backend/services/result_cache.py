@@ -0,0 +1,162 @@
+# In-process read-through cache for OCR history queries
+#
+# GET /ocr/results dan GET /ocr/results/{id} dipanggil berulang kali oleh halaman
+# riwayat. Cache ini menyimpan hasil query Supabase dengan TTL pendek dan
+# diinvalidasi secara tepat oleh penulisan kita sendiri (save/update/delete).
+# Catatan: cache bersifat per-proses; dengan beberapa worker gunicorn, penulisan
+# di worker lain hanya terlihat setelah TTL habis.
+#
+# Kotak kata (word boxes) suatu hasil tidak pernah berubah, jadi disimpan di
+# instance terpisah dengan TTL panjang dan batas memori dalam byte.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from . import metrics
+
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("RESULT_CACHE_TTL_SECONDS", "5"))
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "256"))
+# Values with more rows than this are served but never cached (per-key size bound)
+RESULT_CACHE_MAX_ROWS = int(os.environ.get("RESULT_CACHE_MAX_ROWS", "5000"))
+WORD_BOX_CACHE_TTL_SECONDS = float(os.environ.get("WORD_BOX_CACHE_TTL_SECONDS", "3600"))
+WORD_BOX_CACHE_MAX_BYTES = int(os.environ.get("WORD_BOX_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+LIST_KEY = ("results",)
+
+def detail_key(result_id: str) -> Tuple[str, str]:
+    return ("result", str(result_id))
+
+def word_boxes_key(result_id: str) -> Tuple[str, str]:
+    return ("word_boxes", str(result_id))
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "load_ms", "size")
+
+    def __init__(self, value: Any, expires_at: float, load_ms: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.load_ms = load_ms
+        self.size = size
+
+class ResultCache:
+    """
+    Thread-safe TTL + LRU cache. Loaders run outside the lock; a generation
+    counter (bumped by every invalidation) stops a load that raced with a write
+    from storing data that predates it.
+
+    Values are measured with `size_of` (default: rows of a list, 1 otherwise).
+    A value larger than `max_rows` is served but not cached; with `max_total_size`
+    set, least recently used entries are evicted to keep the sum under it.
+    """
+    def __init__(
+        self,
+        ttl_seconds: float = RESULT_CACHE_TTL_SECONDS,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        max_rows: int = RESULT_CACHE_MAX_ROWS,
+        size_of: Optional[Callable[[Any], int]] = None,
+        max_total_size: Optional[int] = None,
+        name: str = "result_cache"
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.size_of = size_of
+        self.max_total_size = max_total_size
+        self.name = name # Prefix of this cache's metrics
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._total_size = 0
+        self._generation = 0
+
+    def _size(self, value: Any) -> int:
+        if value is None:
+            return 0
+        if self.size_of is not None:
+            return self.size_of(value)
+        return len(value) if isinstance(value, list) else 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_size -= entry.size
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value for `key`, calling `loader()` on a miss or expiry."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                metrics.increment(f"{self.name}_hits")
+                metrics.increment(f"{self.name}_saved_ms", entry.load_ms)
+                return entry.value
+            if entry is not None:
+                self._remove(key)
+            generation = self._generation
+
+        metrics.increment(f"{self.name}_misses")
+        start = time.perf_counter()
+        value = loader()
+        load_ms = (time.perf_counter() - start) * 1000
+
+        size = self._size(value)
+        if self.ttl_seconds <= 0 or size > self.max_rows:
+            return value
+        with self._lock:
+            if self._generation != generation:
+                return value # invalidated while loading; don't cache possibly stale data
+            self._remove(key)
+            self._entries[key] = _Entry(value, time.monotonic() + self.ttl_seconds, load_ms, size)
+            self._total_size += size
+            while len(self._entries) > self.max_entries or (
+                self.max_total_size is not None and self._total_size > self.max_total_size
+            ):
+                self._remove(next(iter(self._entries)))
+        return value
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+            self._generation += 1
+        metrics.increment(f"{self.name}_invalidations", len(keys))
+
+    def invalidate_result(self, result_id: Optional[str] = None) -> None:
+        """A write to one row: drop its detail entry and every list that may contain it."""
+        if result_id is None:
+            self.invalidate(LIST_KEY)
+        else:
+            self.invalidate(LIST_KEY, detail_key(result_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_size = 0
+            self._generation += 1
+
+    def stats(self) -> Dict[str, float]:
+        hits = metrics.get(f"{self.name}_hits")
+        misses = metrics.get(f"{self.name}_misses")
+        with self._lock:
+            entries, total_size = len(self._entries), self._total_size
+        stats = {
+            f"{self.name}_entries": entries,
+            f"{self.name}_hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+        if self.size_of is not None:
+            stats[f"{self.name}_size"] = total_size
+        return stats
+
+# Shared instances used by ocr_service
+cache = ResultCache()
+# Decoded WordBoxes per result: immutable, so long-lived and bounded by bytes
+word_box_cache = ResultCache(
+    ttl_seconds=WORD_BOX_CACHE_TTL_SECONDS,
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    max_rows=WORD_BOX_CACHE_MAX_BYTES,
+    size_of=lambda boxes: boxes.nbytes,
+    max_total_size=WORD_BOX_CACHE_MAX_BYTES,
+    name="word_box_cache"
+)
@@ -0,0 +1,117 @@
+# Direct Tesseract invocation without the PIL / temp-file round trip
+
+import io
+import shlex
+import subprocess
+import threading
+from csv import QUOTE_NONE
+from typing import Optional
+import numpy as np
+import pandas as pd
+import pytesseract
+from .cancellation import OcrCancellation, OcrCancelledError
+
+# How often a running Tesseract process checks for cancellation (seconds)
+CANCEL_POLL_INTERVAL = 0.1
+
+# --- Image Encoding --- #
+# pytesseract.image_to_data menyimpan gambar PIL sebagai PNG ke file sementara,
+# lalu Tesseract membaca dan mendekode PNG itu lagi. Untuk gambar hasil threshold
+# kita cukup mengirim PBM/PGM mentah (tanpa kompresi) langsung lewat stdin.
+
+def encode_pnm(img: np.ndarray) -> bytes:
+    """
+    Encode a 2D uint8 array as binary PNM bytes.
+    Binarised images (only 0/255) become 1-bit PBM (P4), anything else 8-bit PGM (P5).
+    """
+    if img.ndim != 2:
+        raise ValueError(f"Expected a single-channel image, got shape {img.shape}")
+    if img.dtype != np.uint8:
+        img = img.astype(np.uint8)
+
+    height, width = img.shape
+    is_binary = not np.any((img != 0) & (img != 255))
+    if is_binary:
+        # PBM: 1 = black, rows padded to a full byte (np.packbits pads per row on axis=1)
+        packed = np.packbits(img == 0, axis=1)
+        header = f"P4\n{width} {height}\n".encode("ascii")
+        return header + packed.tobytes()
+
+    header = f"P5\n{width} {height}\n255\n".encode("ascii")
+    return header + np.ascontiguousarray(img).tobytes()
+
+# --- Tesseract Execution --- #
+
+def build_tsv_command(config: str = "") -> list:
+    """Command line that reads the image from stdin and writes TSV to stdout."""
+    cmd_args = [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout"]
+    cmd_args += ["-c", "tessedit_create_tsv=1"]
+    if config:
+        cmd_args += shlex.split(config.strip())
+    return cmd_args
+
+def start_tesseract(config: str = "") -> subprocess.Popen:
+    """Spawns the Tesseract process; maps a missing executable to TesseractNotFoundError."""
+    try:
+        return subprocess.Popen(
+            build_tsv_command(config),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise pytesseract.TesseractNotFoundError()
+
+def _watch(proc: subprocess.Popen, cancellation: OcrCancellation, finished: threading.Event) -> None:
+    """
+    Kills Tesseract once `cancellation` fires. Runs beside a blocking communicate(), which
+    then sees EOF on stdout (and a broken stdin pipe) and returns on its own.
+    """
+    while not finished.wait(CANCEL_POLL_INTERVAL):
+        if cancellation.is_cancelled():
+            try:
+                proc.kill()
+            except OSError: # Already exited
+                pass
+            return
+
+def tsv_to_dataframe(tsv_bytes: bytes) -> pd.DataFrame:
+    """Parses Tesseract TSV output the same way pytesseract's DATAFRAME output does."""
+    return pd.read_csv(io.BytesIO(tsv_bytes), sep="\t", quoting=QUOTE_NONE)
+
+def image_to_data(
+    img: np.ndarray,
+    config: str = "",
+    cancellation: Optional[OcrCancellation] = None
+) -> pd.DataFrame:
+    """
+    Drop-in replacement for pytesseract.image_to_data(..., output_type=DATAFRAME)
+    that takes the NumPy buffer directly and streams it to Tesseract over a pipe.
+    If `cancellation` fires while Tesseract is running, the process is killed and
+    OcrCancelledError is raised.
+    """
+    pnm_bytes = encode_pnm(img)
+    if cancellation is not None:
+        # Work may have expired while waiting for a free worker thread
+        cancellation.raise_if_cancelled()
+
+    proc = start_tesseract(config)
+    if cancellation is None:
+        stdout, stderr = proc.communicate(input=pnm_bytes)
+    else:
+        # communicate() writes all of stdin, closes it and drains stdout/stderr; only the
+        # watcher polls, so a slow reader of a large image never stalls the input.
+        finished = threading.Event()
+        watcher = threading.Thread(target=_watch, args=(proc, cancellation, finished), daemon=True)
+        watcher.start()
+        try:
+            stdout, stderr = proc.communicate(input=pnm_bytes)
+        finally:
+            finished.set()
+            watcher.join()
+        if proc.returncode and cancellation.is_cancelled(): # Killed by the watcher
+            raise OcrCancelledError(cancellation.reason)
+
+    if proc.returncode:
+        raise pytesseract.TesseractError(proc.returncode, stderr.decode("utf-8", "replace").strip())
+    return tsv_to_dataframe(stdout)
@@ -0,0 +1,138 @@
+# Compact word-box storage and spatial lookup
+#
+# Kotak kata disimpan per hasil sebagai satu blob biner kolumnar (bukan baris JSON
+# per kata): setiap atribut (left, top, width, height, conf, line) disimpan sebagai
+# array bertipe tetap, teks sebagai offset + UTF-8, lalu seluruhnya dikompres zlib.
+# Untuk query area/baris, blob didekode ke array NumPy lalu kolomnya dipindai
+# langsung (vektor): untuk ribuan kata per halaman ini lebih cepat daripada
+# indeks grid, baik saat membangun maupun saat query.
+
+import struct
+import sys
+import zlib
+from typing import Dict, List, Sequence
+import numpy as np
+
+MAGIC = b"WBX1"
+FLAG_ZLIB = 0x01
+FLAG_COORDS_U16 = 0x02
+
+# MAGIC, flags, word count, processed image width, processed image height
+_HEADER = struct.Struct("<4sBIII")
+
+class WordBoxes:
+    """Column arrays for all words of one OCR result (index i = i-th word in reading order)."""
+    def __init__(
+        self,
+        texts: List[str],
+        left: np.ndarray,
+        top: np.ndarray,
+        width: np.ndarray,
+        height: np.ndarray,
+        conf: np.ndarray,
+        line: np.ndarray,
+        image_width: int = 0,
+        image_height: int = 0
+    ):
+        self.texts = texts
+        self.left = np.asarray(left, dtype=np.int64)
+        self.top = np.asarray(top, dtype=np.int64)
+        self.width = np.asarray(width, dtype=np.int64)
+        self.height = np.asarray(height, dtype=np.int64)
+        self.conf = np.asarray(conf, dtype=np.float32)
+        self.line = np.asarray(line, dtype=np.int64)
+        self.right = self.left + self.width
+        self.bottom = self.top + self.height
+        self.image_width = image_width
+        self.image_height = image_height
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint (column arrays + text objects), for cache accounting."""
+        columns = (self.left, self.top, self.width, self.height, self.right, self.bottom, self.conf, self.line)
+        return sum(column.nbytes for column in columns) + sum(sys.getsizeof(text) for text in self.texts)
+
+    def query_rect(self, left: int, top: int, right: int, bottom: int, contained: bool = False) -> np.ndarray:
+        """Indices (reading order) of words overlapping — or fully inside — the rectangle."""
+        if right <= left or bottom <= top:
+            return np.empty(0, dtype=np.int64)
+        if contained:
+            mask = (self.left >= left) & (self.top >= top) & (self.right <= right) & (self.bottom <= bottom)
+        else:
+            mask = (self.left < right) & (self.right > left) & (self.top < bottom) & (self.bottom > top)
+        return np.flatnonzero(mask)
+
+    def query_line(self, line: int) -> np.ndarray:
+        """Indices (reading order) of the words on one text line."""
+        return np.flatnonzero(self.line == line)
+
+    def to_dicts(self, indices: Sequence[int]) -> List[Dict]:
+        return [
+            {
+                'text': self.texts[i],
+                'left': int(self.left[i]),
+                'top': int(self.top[i]),
+                'width': int(self.width[i]),
+                'height': int(self.height[i]),
+                'confidence': float(self.conf[i]),
+                'line': int(self.line[i]),
+            }
+            for i in indices
+        ]
+
+# --- Binary Encoding --- #
+
+def encode(boxes: WordBoxes, compress: bool = True) -> bytes:
+    """Serializes WordBoxes into the compact columnar blob."""
+    count = len(boxes)
+    max_coord = int(max(boxes.right.max(initial=0), boxes.bottom.max(initial=0)))
+    flags = FLAG_COORDS_U16 if max_coord < 2**16 else 0
+    coord_dtype = "<u2" if flags & FLAG_COORDS_U16 else "<u4"
+
+    encoded_texts = [text.encode("utf-8") for text in boxes.texts]
+    offsets = np.zeros(count + 1, dtype="<u4")
+    if count:
+        np.cumsum([len(t) for t in encoded_texts], out=offsets[1:])
+
+    body = b"".join([
+        boxes.left.astype(coord_dtype).tobytes(),
+        boxes.top.astype(coord_dtype).tobytes(),
+        boxes.width.astype(coord_dtype).tobytes(),
+        boxes.height.astype(coord_dtype).tobytes(),
+        np.clip(np.rint(boxes.conf), 0, 100).astype("u1").tobytes(),
+        boxes.line.astype("<u4").tobytes(),
+        offsets.tobytes(),
+        b"".join(encoded_texts),
+    ])
+    if compress:
+        flags |= FLAG_ZLIB
+        body = zlib.compress(body, 6)
+    return _HEADER.pack(MAGIC, flags, count, boxes.image_width, boxes.image_height) + body
+
+def decode(blob: bytes) -> WordBoxes:
+    """Inverse of encode()."""
+    magic, flags, count, image_width, image_height = _HEADER.unpack_from(blob, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a word-box blob")
+    body = blob[_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    coord_dtype = np.dtype("<u2" if flags & FLAG_COORDS_U16 else "<u4")
+    position = 0
+    def take(dtype: np.dtype, length: int) -> np.ndarray:
+        nonlocal position
+        array = np.frombuffer(body, dtype=dtype, count=length, offset=position)
+        position += dtype.itemsize * length
+        return array
+
+    left, top, width, height = (take(coord_dtype, count) for _ in range(4))
+    conf = take(np.dtype("u1"), count)
+    line = take(np.dtype("<u4"), count)
+    offsets = take(np.dtype("<u4"), count + 1)
+    text_bytes = body[position:]
+    texts = [text_bytes[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(count)]
+    return WordBoxes(texts, left, top, width, height, conf, line, image_width, image_height)
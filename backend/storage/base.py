@@ -0,0 +1,83 @@
+# Storage interface for OCR results and their images
+#
+# Konsep OOP: Abstraksi + Polymorphism
+# ocr_service hanya bergantung pada interface OcrStorage; implementasi konkret
+# (Supabase atau SQLite + filesystem lokal) dipilih lewat konfigurasi.
+# Semua method bersifat sinkron (blocking) dan dipanggil lewat run_in_threadpool.
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+RESULT_COLUMNS = ['id', 'file_name', 'extracted_text', 'processed_at', 'image_url']
+
+class OcrStorage(ABC):
+    """Persistence for ocr_results rows and the uploaded images they reference."""
+
+    # --- Result rows --- #
+    @abstractmethod
+    def insert_result(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Inserts a row (without id) and returns the stored row including its id.
+        The row may carry 'word_boxes' (bytes, see services/word_boxes.py); it is
+        stored alongside the row but never returned by the other row queries.
+        """
+
+    @abstractmethod
+    def get_result(self, result_id: str) -> Optional[Dict[str, Any]]:
+        """Returns one row by id, or None."""
+
+    @abstractmethod
+    def list_results(self) -> List[Dict[str, Any]]:
+        """All rows, newest processed_at first."""
+
+    @abstractmethod
+    def iter_result_pages(
+        self,
+        processed_from: Optional[str] = None,
+        processed_to: Optional[str] = None,
+        chunk_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Pages of rows ordered by (processed_at, id); bounds are UTC ISO strings, [from, to)."""
+
+    @abstractmethod
+    def get_word_boxes(self, result_id: str) -> Optional[bytes]:
+        """The word-box blob saved with a result, or None."""
+
+    @abstractmethod
+    def update_result(self, result_id: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Applies `payload` to one row; returns the updated rows (empty if not found)."""
+
+    def replace_result(self, result_id: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Applies `payload` to one row and returns the row as it was before (None if not found),
+        so the caller releases exactly the image the update replaced. This default reads and
+        then writes; backends with transactions do both atomically.
+        """
+        previous = self.get_result(result_id)
+        if previous is None or not self.update_result(result_id, payload):
+            return None
+        return previous
+
+    @abstractmethod
+    def delete_result(self, result_id: str) -> List[Dict[str, Any]]:
+        """Deletes one row; returns the deleted rows (empty if not found)."""
+
+    # --- Images --- #
+    @abstractmethod
+    def upload_image(self, name: str, data: bytes, content_type: str) -> str:
+        """
+        Stores image bytes and returns the public URL to save in image_url.
+        Every call is one reference to the image, released by one delete_image() call.
+        """
+
+    @abstractmethod
+    def delete_image(self, image_url: str) -> None:
+        """
+        Releases one reference to the image behind `image_url`, removing it once none are
+        left (errors are logged, not raised).
+        """
+
+    def local_image_path(self, image_name: str) -> Optional[Path]:
+        """Filesystem path for images served by this API itself; None for remote storage."""
+        return None
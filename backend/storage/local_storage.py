@@ -0,0 +1,241 @@
+# Local implementation of OcrStorage: SQLite (WAL) + content-addressed image files
+#
+# Untuk instalasi on-prem / satu mesin: tidak ada round trip WAN, dan seluruh
+# service bisa dijalankan serta di-benchmark secara offline.
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import traceback
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from .base import OcrStorage, RESULT_COLUMNS
+
+# Content-addressed names: sha256 hex digest + original extension
+_IMAGE_NAME_RE = re.compile(r'^[0-9a-f]{64}(\.[A-Za-z0-9]{1,8})?$')
+# Explicit column list so the word_boxes blob is only read when asked for
+_COLUMNS = ', '.join(RESULT_COLUMNS)
+
+# PRAGMA user_version once image_refs has been backfilled from existing rows
+SCHEMA_VERSION_IMAGE_REFS = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_results (
+    id TEXT PRIMARY KEY,
+    file_name TEXT,
+    extracted_text TEXT,
+    processed_at TEXT NOT NULL,
+    image_url TEXT,
+    word_boxes BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_ocr_results_processed_at ON ocr_results (processed_at, id);
+CREATE INDEX IF NOT EXISTS idx_ocr_results_image_url ON ocr_results (image_url);
+-- One reference per upload_image() call, released by delete_image(); the file goes at zero
+CREATE TABLE IF NOT EXISTS image_refs (
+    image_name TEXT PRIMARY KEY,
+    refs INTEGER NOT NULL
+);
+"""
+
+class LocalStorage(OcrStorage):
+    def __init__(self, root_dir: Path, public_base_url: str):
+        self.root_dir = Path(root_dir)
+        self.images_dir = self.root_dir / 'images'
+        self.db_path = self.root_dir / 'ocr_results.sqlite3'
+        self.public_base_url = public_base_url.rstrip('/')
+        self.images_dir.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        self._migrate(conn)
+        print(f"Local storage ready: {self.db_path} (images in {self.images_dir})")
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (run_in_threadpool uses a pool of worker threads)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL") # durable across app crashes, fsync only at checkpoints
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """
+        Brings a database file created by an older version up to date. Runs under the write
+        lock and re-checks the state inside it: every worker process calls this at startup.
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existing = {row['name'] for row in conn.execute("PRAGMA table_info(ocr_results)")}
+            if 'word_boxes' not in existing:
+                conn.execute("ALTER TABLE ocr_results ADD COLUMN word_boxes BLOB")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION_IMAGE_REFS:
+                # Databases from before image_refs: every row pointing at an image holds one reference
+                counts: Dict[str, int] = {}
+                for row in conn.execute("SELECT image_url FROM ocr_results WHERE image_url IS NOT NULL"):
+                    image_name = row['image_url'].rsplit('/', 1)[-1]
+                    if _IMAGE_NAME_RE.match(image_name):
+                        counts[image_name] = counts.get(image_name, 0) + 1
+                conn.execute("DELETE FROM image_refs")
+                conn.executemany("INSERT INTO image_refs (image_name, refs) VALUES (?, ?)", counts.items())
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION_IMAGE_REFS}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE: takes the database write lock up front, so writers run one at a time."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _rows(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+        return [dict(row) for row in cursor.fetchall()]
+
+    # --- Result rows --- #
+    def insert_result(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        stored = {column: row.get(column) for column in RESULT_COLUMNS}
+        stored['id'] = str(row.get('id') or uuid.uuid4())
+        word_boxes = row.get('word_boxes')
+        self._conn().execute(
+            "INSERT INTO ocr_results (id, file_name, extracted_text, processed_at, image_url, word_boxes) "
+            "VALUES (:id, :file_name, :extracted_text, :processed_at, :image_url, :word_boxes)",
+            {**stored, 'word_boxes': sqlite3.Binary(word_boxes) if word_boxes is not None else None}
+        )
+        return stored
+
+    def get_result(self, result_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._rows(self._conn().execute(f"SELECT {_COLUMNS} FROM ocr_results WHERE id = ?", (str(result_id),)))
+        return rows[0] if rows else None
+
+    def get_word_boxes(self, result_id: str) -> Optional[bytes]:
+        row = self._conn().execute("SELECT word_boxes FROM ocr_results WHERE id = ?", (str(result_id),)).fetchone()
+        return bytes(row['word_boxes']) if row and row['word_boxes'] is not None else None
+
+    def list_results(self) -> List[Dict[str, Any]]:
+        return self._rows(self._conn().execute(f"SELECT {_COLUMNS} FROM ocr_results ORDER BY processed_at DESC, id DESC"))
+
+    def iter_result_pages(
+        self,
+        processed_from: Optional[str] = None,
+        processed_to: Optional[str] = None,
+        chunk_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        # Keyset pagination on the (processed_at, id) index: every page is an index range scan
+        last_key = None
+        while True:
+            clauses, params = [], []
+            if processed_from is not None:
+                clauses.append("processed_at >= ?")
+                params.append(processed_from)
+            if processed_to is not None:
+                clauses.append("processed_at < ?")
+                params.append(processed_to)
+            if last_key is not None:
+                clauses.append("(processed_at, id) > (?, ?)")
+                params.extend(last_key)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            rows = self._rows(self._conn().execute(
+                f"SELECT {_COLUMNS} FROM ocr_results {where} ORDER BY processed_at, id LIMIT ?",
+                (*params, chunk_size)
+            ))
+            if rows:
+                yield rows
+            if len(rows) < chunk_size:
+                return
+            last_key = (rows[-1]['processed_at'], rows[-1]['id'])
+
+    def update_result(self, result_id: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        previous = self.replace_result(result_id, payload)
+        if previous is None:
+            return []
+        row = self.get_result(result_id)
+        return [row] if row else []
+
+    def replace_result(self, result_id: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        assignments = {column: value for column, value in payload.items() if column in RESULT_COLUMNS and column != 'id'}
+        with self._write_transaction() as conn:
+            rows = self._rows(conn.execute(f"SELECT {_COLUMNS} FROM ocr_results WHERE id = ?", (str(result_id),)))
+            if not rows:
+                return None
+            if assignments:
+                set_clause = ', '.join(f"{column} = :{column}" for column in assignments)
+                conn.execute(
+                    f"UPDATE ocr_results SET {set_clause} WHERE id = :result_id",
+                    {**assignments, 'result_id': str(result_id)}
+                )
+        return rows[0]
+
+    def delete_result(self, result_id: str) -> List[Dict[str, Any]]:
+        # RETURNING: of two concurrent deletes only the one that removed the row gets it back
+        with self._write_transaction() as conn:
+            return self._rows(conn.execute(
+                f"DELETE FROM ocr_results WHERE id = ? RETURNING {_COLUMNS}", (str(result_id),)
+            ))
+
+    # --- Images --- #
+    def upload_image(self, name: str, data: bytes, content_type: str) -> str:
+        # Identical uploads share one file; the name is derived from the content only
+        extension = Path(name).suffix.lower()
+        if extension and not re.fullmatch(r'\.[a-z0-9]{1,8}', extension):
+            extension = ''
+        image_name = hashlib.sha256(data).hexdigest() + extension
+        target = self._image_file(image_name)
+        # The reference is taken together with the file write, before the caller saves its row,
+        # so a concurrent delete_image() of another row with the same content keeps the file
+        with self._write_transaction() as conn:
+            conn.execute(
+                "INSERT INTO image_refs (image_name, refs) VALUES (?, 1) "
+                "ON CONFLICT (image_name) DO UPDATE SET refs = refs + 1",
+                (image_name,)
+            )
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, target) # atomic: readers never see a partial file
+        return f"{self.public_base_url}/{image_name}"
+
+    def delete_image(self, image_url: str) -> None:
+        image_name = image_url.rsplit('/', 1)[-1]
+        if not _IMAGE_NAME_RE.match(image_name):
+            print(f"Could not reliably extract image name from URL: {image_url}")
+            return
+        try:
+            # Content-addressed files may be shared by several uploads; release one reference
+            with self._write_transaction() as conn:
+                row = conn.execute("SELECT refs FROM image_refs WHERE image_name = ?", (image_name,)).fetchone()
+                refs = (row['refs'] if row else 0) - 1
+                if refs > 0:
+                    conn.execute("UPDATE image_refs SET refs = ? WHERE image_name = ?", (refs, image_name))
+                    print(f"Image {image_name} is still referenced ({refs} left); keeping it.")
+                    return
+                conn.execute("DELETE FROM image_refs WHERE image_name = ?", (image_name,))
+                self._image_file(image_name).unlink(missing_ok=True)
+        except Exception as storage_error:
+            print(f"Error deleting local image {image_name}: {storage_error}")
+            traceback.print_exc()
+
+    def _image_file(self, image_name: str) -> Path:
+        return self.images_dir / image_name[:2] / image_name
+
+    def local_image_path(self, image_name: str) -> Optional[Path]:
+        if not _IMAGE_NAME_RE.match(image_name):
+            return None
+        path = self._image_file(image_name)
+        return path if path.is_file() else None
@@ -0,0 +1,120 @@
+# Supabase implementation of OcrStorage (table 'ocr_results' + bucket 'ocr-images')
+
+import traceback
+from typing import Any, Dict, Iterator, List, Optional
+from .base import OcrStorage, RESULT_COLUMNS
+
+OCR_RESULTS_TABLE = "ocr_results"
+OCR_IMAGES_BUCKET = "ocr-images"
+# Explicit column list so the word_boxes blob is only fetched when asked for
+_COLUMNS = ','.join(RESULT_COLUMNS)
+
+def _filter_value(value: Any) -> str:
+    """Quotes a value for a PostgREST logic tree (timestamps contain the reserved '.' and ':')."""
+    escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
+
+def _response_data(response: Any) -> Any:
+    # supabase-py v2 returns data in response.data; maybe_single() may return None itself
+    if response is not None and hasattr(response, 'data'):
+        return response.data
+    return None
+
+class SupabaseStorage(OcrStorage):
+    def __init__(self, client, bucket_name: str = OCR_IMAGES_BUCKET):
+        self.client = client
+        self.bucket_name = bucket_name
+
+    def _table(self):
+        return self.client.table(OCR_RESULTS_TABLE)
+
+    # --- Result rows --- #
+    def insert_result(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        payload = dict(row)
+        if payload.get('word_boxes') is not None:
+            # PostgREST accepts bytea as a hex string
+            payload['word_boxes'] = '\\x' + bytes(payload['word_boxes']).hex()
+        data = _response_data(self._table().insert(payload).execute())
+        stored = data[0] if data else payload
+        return {column: stored.get(column) for column in RESULT_COLUMNS}
+
+    def get_result(self, result_id: str) -> Optional[Dict[str, Any]]:
+        return _response_data(self._table().select(_COLUMNS).eq('id', result_id).maybe_single().execute()) or None
+
+    def get_word_boxes(self, result_id: str) -> Optional[bytes]:
+        row = _response_data(self._table().select('word_boxes').eq('id', result_id).maybe_single().execute())
+        value = row.get('word_boxes') if row else None
+        if not value:
+            return None
+        if isinstance(value, str) and value.startswith('\\x'):
+            return bytes.fromhex(value[2:])
+        return bytes(value)
+
+    def list_results(self) -> List[Dict[str, Any]]:
+        response = self._table().select(_COLUMNS).order('processed_at', desc=True).execute()
+        if not hasattr(response, 'data'):
+            raise RuntimeError(f"Supabase response structure unexpected: {response}")
+        return response.data or []
+
+    def iter_result_pages(
+        self,
+        processed_from: Optional[str] = None,
+        processed_to: Optional[str] = None,
+        chunk_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        # Keyset pagination on (processed_at, id), like LocalStorage: each page starts right
+        # after the previous one instead of skipping `offset` rows, so late pages stay cheap
+        # and rows deleted mid-export can't shift later rows out of the result.
+        last_key = None
+        while True:
+            query = self._table().select(_COLUMNS)
+            if processed_from is not None:
+                query = query.gte('processed_at', processed_from)
+            if processed_to is not None:
+                query = query.lt('processed_at', processed_to)
+            if last_key is not None:
+                # PostgREST has no row comparison: (processed_at, id) > (t, i) spelled out
+                processed_at, row_id = (_filter_value(value) for value in last_key)
+                query = query.or_(f"processed_at.gt.{processed_at},and(processed_at.eq.{processed_at},id.gt.{row_id})")
+            response = query.order('processed_at').order('id').limit(chunk_size).execute()
+            rows = _response_data(response) or []
+            if rows:
+                yield rows
+            if len(rows) < chunk_size:
+                return
+            last_key = (rows[-1]['processed_at'], rows[-1]['id'])
+
+    def update_result(self, result_id: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return _response_data(self._table().update(payload).eq('id', result_id).execute()) or []
+
+    def delete_result(self, result_id: str) -> List[Dict[str, Any]]:
+        return _response_data(self._table().delete().eq('id', result_id).execute()) or []
+
+    # --- Images --- #
+    def upload_image(self, name: str, data: bytes, content_type: str) -> str:
+        bucket = self.client.storage.from_(self.bucket_name)
+        response = bucket.upload(path=name, file=data, file_options={'content-type': content_type})
+        print(f"Supabase upload response: {response}")
+        public_url = bucket.get_public_url(name)
+        # supabase-py v2 returns the URL directly
+        if not isinstance(public_url, str):
+            raise RuntimeError(f"Could not retrieve public URL or unexpected format: {public_url}")
+        return public_url
+
+    def delete_image(self, image_url: str) -> None:
+        # URL looks like .../<bucket_name>/<image_file_name.ext>
+        image_path = image_url.split(f"/{self.bucket_name}/")[-1]
+        if not image_path or image_path == image_url:
+            print(f"Could not reliably extract path from image URL: {image_url}")
+            return
+        try:
+            print(f"Attempting to delete image '{image_path}' from bucket '{self.bucket_name}'...")
+            response = self.client.storage.from_(self.bucket_name).remove([image_path])
+            print(f"Supabase storage delete response for '{image_path}': {response}")
+            if response and isinstance(response, list) and isinstance(response[0], dict) and response[0].get('error'):
+                print(f"Error reported by Supabase deleting '{image_path}': {response[0]['error']}")
+            elif not response:
+                print(f"Warning: Supabase delete response for '{image_path}' was empty or unexpected.")
+        except Exception as storage_error:
+            print(f"Error deleting image '{image_path}' from Supabase Storage: {storage_error}")
+            traceback.print_exc()